@@ -0,0 +1,40 @@
+<?php
+
+// Events stored by the application, filtered by the from, to (Unix timestamps),
+// camera and label parameters. Returns the latest events first, at most limit, between 1 and MAX_LIMIT.
+$db = new PDO("sqlite:../resources/video_data/events.db", null, null,
+              array(PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION));
+
+$conditions = array();
+$params = array();
+$filters = array("camera" => "camera = ?", "label" => "label = ?", "from" => "timestamp >= ?", "to" => "timestamp < ?");
+foreach ($filters as $name => $condition) {
+    if (isset($_GET[$name])) {
+        $conditions[] = $condition;
+        $params[] = $_GET[$name];
+    }
+}
+// At most MAX_LIMIT events, a limit below 1 returns a single event
+define("MAX_LIMIT", 1000);
+$limit = 100;
+if (isset($_GET["limit"])) {
+    $limit = filter_var($_GET["limit"], FILTER_VALIDATE_INT);
+    if ($limit === false) {
+        http_response_code(400);
+        exit;
+    }
+    $limit = max(1, min($limit, MAX_LIMIT));
+}
+
+$sql = "SELECT seq, timestamp, video, camera, label, count, frame, video_time, track, clip, clip_time FROM events";
+if ($conditions) {
+    $sql .= " WHERE " . implode(" AND ", $conditions);
+}
+$sql .= " ORDER BY timestamp DESC LIMIT ?";
+$params[] = $limit;
+
+$query = $db->prepare($sql);
+$query->execute($params);
+
+header("Content-Type: application/json");
+echo json_encode($query->fetchAll(PDO::FETCH_ASSOC));
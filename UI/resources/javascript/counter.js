@@ -28,6 +28,10 @@ var videosInPage = [];
 var durations = [];
 /* +- for video seek and counters display*/
 var deviation = 100;
+/* bucket sizes in seconds of the timeline files written by the application, finest first*/
+var timelineResolutions = [1, 60, 3600];
+/* minimum width in pixels of a bucket of the timeline*/
+var minBucketWidth = 12;
 
 var timelineData = {
     start_time: 0,
@@ -85,22 +89,25 @@ function generateTimelines() {
 
     timelineData.stop_time = Math.max.apply(Math,durations)*1000;
 
-    $.getJSON('resources/video_data/data.json')
+    var resolution = timelineResolution(timelineData.stop_time/1000);
+
+    $.getJSON('resources/video_data/timeline_' + resolution + '.json')
         .done(function(data) {
-            var json = data;
+            var json = data.videos;
 
             for (var i in json) {
                 if (timelineData.lines[i] !== undefined && jQuery.inArray(i, Object.keys(videosInPage)) !== -1) {
 
-                    for (var idx in json[i]) {
+                    for (var bucket in json[i]) {
                         timelineData.lines[i].events.push({
                             id: (timelineData.lines[i].events.length+1),
-                            time: idx*1000,
-                            counter: json[i][idx]
+                            time: bucket*1000,
+                            counter: json[i][bucket].count,
+                            labels: json[i][bucket].labels
                         });
                     }
 
-                    timelineData.lines[i].total = json['totals'][i];
+                    timelineData.lines[i].total = data.totals[i];
                 }
             }
 
@@ -124,6 +131,18 @@ function generateTimelines() {
             console.log("Data for video could not be loaded!");
         });
 }
+/* finest resolution whose buckets are not narrower than minBucketWidth on the timeline*/
+function timelineResolution(duration) {
+    var width = $('.tl').width() || 1;
+
+    for (var i = 0; i < timelineResolutions.length; i++) {
+        if (duration / timelineResolutions[i] * minBucketWidth <= width) {
+            return timelineResolutions[i];
+        }
+    }
+    return timelineResolutions[timelineResolutions.length - 1];
+}
+
 function generateAlerts() {
 
     //reset timelinedata before reading it again
@@ -38,10 +38,12 @@
             $.each(data.lines, function(i,line){
                 var lineTmpl = $('<div class="line"><div class="events"></div><h4 class="total">'+line.total+'</h4></div>').addClass("line "+ line.css).appendTo($el);
 
+                // one circle per time bucket, with the number of events of every label in its title
                 $.each(line.events, function(index,event){
                     var position = ((event.time - data.start_time)*ratio).toFixed(2);
+                    var title = $.map(event.labels || {}, function(count, label){ return label+': '+count; }).join(', ');
 
-                    var eventTmpl = $('<div class="event"><div class="circle" data-videoid="'+i+'" data-eventtime="'+event.time+'"><div class="circle-inner"></div></div></div>').appendTo($('.events', lineTmpl)).css('left',position+'%');
+                    var eventTmpl = $('<div class="event"><div class="circle" data-videoid="'+i+'" data-eventtime="'+event.time+'" data-count="'+event.counter+'"><div class="circle-inner"></div></div></div>').appendTo($('.events', lineTmpl)).css('left',position+'%').attr('title', title);
                 });
             });
 
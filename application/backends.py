@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import json
+import hashlib
+import threading
+import logging as log
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy
+from events import write_atomic
+
+# Inference backends
+BACKEND_OPENVINO = "openvino"
+BACKEND_OPENCV = "opencv"
+BACKEND_ONNX = "onnx"
+BACKEND_FAKE = "fake"
+
+# Infer requests created by the thread based backends when 0 is asked for
+DEFAULT_NUM_REQUESTS = 2
+# Input shape of the fake backend when the model has no IR to read it from
+FAKE_INPUT_SHAPE = [1, 3, 300, 300]
+# Maximum number of detections of the fake backend per frame
+FAKE_MAX_DETECTIONS = 3
+# Bytes read at once when hashing a model file
+CACHE_CHUNK_SIZE = 1 << 20
+
+
+class BackendError(Exception):
+    """
+    Raised when a backend cannot load the model. The error of the runtime is the cause.
+    """
+
+
+def read_ir_input_shape(model_xml):
+    """
+    Reads the shape of the input layer from an OpenVINO IR, without the Inference Engine.
+    :param model_xml: .xml file of the IR
+    :return: Shape of the input layer in NCHW layout
+    """
+    try:
+        root = ElementTree.parse(model_xml).getroot()
+        for layer in root.iter('layer'):
+            if layer.get('type') in ('Parameter', 'Input'):
+                return [int(dim.text) for dim in layer.find('output').find('port').iter('dim')]
+    except (ElementTree.ParseError, AttributeError, TypeError) as err:
+        raise ValueError("Invalid IR {}: {}".format(model_xml, err)) from err
+    raise ValueError("No input layer found in " + model_xml)
+
+
+def parse_input_resolution(resolution):
+    """
+    Reads the resolution of the model input given on the command line, as "<width>x<height>".
+    :param resolution: Resolution of the input, empty or None to read it from the model
+    :return: None or (width, height)
+    """
+    if not resolution:
+        return None
+    width, height = [int(value) for value in resolution.lower().split('x')]
+    if width < 1 or height < 1:
+        raise ValueError("The input resolution is at least 1x1")
+    return width, height
+
+
+def model_file(model, extension):
+    """
+    Gives the file of the model in the format read by a backend. A model given in an
+    other format is looked for next to it, with the same name.
+    :param model: Path of the model given on the command line
+    :param extension: Extension of the format read by the backend
+    :return: Path of the model file
+    """
+    if model.endswith(extension):
+        return model
+    return os.path.splitext(model)[0] + extension
+
+
+def cache_key(files, config):
+    """
+    Gives the name of the compiled model in the cache. It changes whenever the
+    content of a model file or anything else the compilation depends on changes.
+    :param files: Files of the model
+    :param config: Dict of the device and options of the compilation
+    :return: Hex digest of the model files and config
+    """
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, 'rb') as model:
+            for chunk in iter(lambda: model.read(CACHE_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class Backend:
+    """
+    Interface of the inference runtimes. A backend holds a pool of infer requests,
+    each with its own input buffer in NCHW layout, 8 bits per channel. A request is
+    started asynchronously and reports its completion through a callback.
+    The output of a request is in the DetectionOutput layout [1, 1, N, 7].
+    """
+
+    def __init__(self):
+        self.plugin = None
+        self.input_shape = None
+        self.input_buffers = []
+        self.callback = None
+
+    @property
+    def num_requests(self):
+        return len(self.input_buffers)
+
+    def load(self, model, device, num_requests, batch_size=1, cpu_extension=None, plugin=None, cache_dir=None,
+             input_resolution=None):
+        """
+        Loads the model and creates the infer requests.
+        :param model: Path of the model
+        :param device: Target device
+        :param num_requests: Number of infer requests, 0 for the optimal number of the backend
+        :param batch_size: Number of frames inferred together by one infer request
+        :param cpu_extension: extension for the CPU device
+        :param plugin: Plugin for specified device
+        :param cache_dir: Directory of the compiled models, None to compile the model on every start
+        :param input_resolution: Width and height of the input, None to read them from the model. Only used
+                                 by the backends which can't read them from every model format.
+        :return: None
+        :raises BackendError: The runtime failed to read or compile the model
+        """
+        raise NotImplementedError
+
+    def set_completion_callback(self, callback):
+        """
+        :param callback: Called with the status and the index of every request which completes
+        :return: None
+        """
+        self.callback = callback
+
+    def start(self, request_id):
+        """
+        Starts inferring the input buffer of a request.
+        :param request_id: Index of the infer request
+        :return: None
+        """
+        raise NotImplementedError
+
+    def wait(self, request_id):
+        """
+        Waits for a request to complete.
+        :param request_id: Index of the infer request
+        :return: Status of the request, 0 on success
+        """
+        raise NotImplementedError
+
+    def output(self, request_id, output=None):
+        """
+        :param request_id: Index of the infer request
+        :param output: Name of the output layer, None for the first one
+        :return: Output of the last inference of the request
+        """
+        raise NotImplementedError
+
+    def perf_counts(self, request_id):
+        """
+        :param request_id: Index of the infer request
+        :return: Performance of the layers, by layer name
+        """
+        return {}
+
+    def close(self):
+        pass
+
+
+class OpenVinoBackend(Backend):
+    """
+    Runs the model with the Inference Engine of the Intel® Distribution of OpenVINO™ toolkit.
+    With a cache directory, the network compiled for the device is exported there and
+    imported on the next starts, along with a JSON file of its inputs and outputs.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.net = None
+        self.exec_net = None
+        self.input_blob = None
+        self.out_blob = None
+
+    def load(self, model, device, num_requests, batch_size=1, cpu_extension=None, plugin=None, cache_dir=None,
+             input_resolution=None):
+        # Imported here so that the other backends run without OpenVINO
+        from openvino.inference_engine import IECore, get_version
+
+        try:
+            model_xml = model
+            model_bin = os.path.splitext(model_xml)[0] + ".bin"
+            # Plugin initialization for specified device
+            # and load extensions library if specified
+            if not plugin:
+                log.info("Initializing plugin for {} device...".format(device))
+                self.plugin = IECore()
+            else:
+                self.plugin = plugin
+
+            if cpu_extension and 'CPU' in device:
+                self.plugin.add_extension(cpu_extension, "CPU")
+
+            cache_file = None
+            if cache_dir:
+                cache_file = os.path.join(cache_dir, cache_key([model_xml, model_bin], {
+                    'device': device, 'batch_size': batch_size, 'cpu_extension': cpu_extension,
+                    'version': get_version()}))
+            if not (cache_file and self.import_network(cache_file, device, num_requests)):
+                self.compile_network(model_xml, model_bin, device, num_requests, batch_size)
+                if cache_file:
+                    self.export_network(cache_file)
+
+            for request_id, request in enumerate(self.exec_net.requests):
+                request.set_completion_callback(self._on_completion, request_id)
+            # Frames are preprocessed straight into the input blob of their infer request
+            self.input_buffers = [request.inputs[self.input_blob] for request in self.exec_net.requests]
+        except RuntimeError as err:
+            raise BackendError("The Inference Engine could not load {}: {}".format(model, err)) from err
+
+    def compile_network(self, model_xml, model_bin, device, num_requests, batch_size):
+        """
+        Reads the IR and compiles it for the device.
+        :param model_xml: .xml file of the IR
+        :param model_bin: .bin file of the IR
+        :param device: Target device
+        :param num_requests: Number of infer requests, 0 for the optimal number of the device
+        :param batch_size: Number of frames inferred together by one infer request
+        :return: None
+        """
+        # Read IR
+        log.info("Reading IR...")
+        self.net = self.plugin.read_network(model=model_xml, weights=model_bin)
+        log.info("Loading IR to the plugin...")
+
+        if "CPU" in device:
+            supported_layers = self.plugin.query_network(self.net, "CPU")
+            not_supported_layers = \
+                [l for l in self.net.layers.keys() if l not in supported_layers]
+            if len(not_supported_layers) != 0:
+                # Raised on the thread of the model load, the caller reports it
+                raise BackendError("Following layers are not supported by the plugin for specified device {}: {}. "
+                                   "Please try to specify cpu extensions library path in command line parameters "
+                                   "using -l or --cpu_extension command line argument"
+                                   .format(device, ', '.join(not_supported_layers)))
+
+        # Reshape the network so that one infer request takes a batch of frames
+        if batch_size > 1:
+            log.info("Reshaping the network to batch size {}...".format(batch_size))
+            self.net.batch_size = batch_size
+
+        # Frames are given to the network as they are decoded, 8 bits per channel
+        self.input_blob = next(iter(self.net.inputs))
+        self.net.inputs[self.input_blob].precision = "U8"
+        self.out_blob = next(iter(self.net.outputs))
+        self.input_shape = self.net.inputs[self.input_blob].shape
+
+        # Loads network read from IR to the plugin. With num_requests set to 0
+        # the plugin creates the optimal number of infer requests for the device
+        self.exec_net = self.plugin.load_network(network=self.net, num_requests=num_requests, device_name=device)
+
+    def import_network(self, cache_file, device, num_requests):
+        """
+        Imports the compiled network from the cache, skipping the IR reading and the layer queries.
+        :param cache_file: Path of the cached network, without extension
+        :param device: Target device
+        :param num_requests: Number of infer requests, 0 for the number created when the network was compiled
+        :return: True if the network was imported, False if it has to be compiled
+        """
+        if not os.path.isfile(cache_file + ".json"):
+            return False
+        try:
+            with open(cache_file + ".json") as meta_file:
+                meta = json.load(meta_file)
+            log.info("Importing the compiled network from {}...".format(cache_file + ".blob"))
+            self.exec_net = self.plugin.import_network(model_file=cache_file + ".blob", device_name=device,
+                                                       num_requests=num_requests or meta['num_requests'])
+        except (OSError, ValueError, KeyError, RuntimeError) as err:
+            log.warning("Could not import the cached network, compiling the model: {}".format(err))
+            return False
+        self.input_blob = meta['input']
+        self.out_blob = meta['output']
+        self.input_shape = meta['input_shape']
+        return True
+
+    def export_network(self, cache_file):
+        """
+        Exports the compiled network to the cache. Not all the devices can export their networks.
+        :param cache_file: Path of the cached network, without extension
+        :return: None
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            self.exec_net.export(cache_file + ".blob.tmp")
+            os.replace(cache_file + ".blob.tmp", cache_file + ".blob")
+            # The metadata is written last, a network without it is never imported
+            write_atomic(cache_file + ".json", json.dumps({
+                'input': self.input_blob, 'output': self.out_blob, 'input_shape': list(self.input_shape),
+                'num_requests': len(self.exec_net.requests)}))
+        except (OSError, RuntimeError) as err:
+            log.warning("Could not cache the compiled network: {}".format(err))
+
+    def _on_completion(self, status, request_id):
+        self.callback(status, request_id)
+
+    def start(self, request_id):
+        self.exec_net.requests[request_id].async_infer()
+
+    def wait(self, request_id):
+        return self.exec_net.requests[request_id].wait(-1)
+
+    def output(self, request_id, output=None):
+        return self.exec_net.requests[request_id].outputs[output or self.out_blob]
+
+    def perf_counts(self, request_id):
+        return self.exec_net.requests[request_id].get_perf_counts()
+
+    def close(self):
+        del self.exec_net
+        del self.plugin
+        del self.net
+
+
+class ThreadedBackend(Backend):
+    """
+    Base of the runtimes without asynchronous requests of their own. Every started
+    request runs infer() on a pool of threads with one thread per request.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.executor = None
+        self.outputs = []
+        self.status = []
+        self.done = []
+
+    def create_requests(self, num_requests, input_shape):
+        """
+        Creates the input buffers and the threads of the requests.
+        :param num_requests: Number of infer requests, 0 for DEFAULT_NUM_REQUESTS
+        :param input_shape: Shape of the input of one request in NCHW layout
+        :return: None
+        """
+        num_requests = num_requests or DEFAULT_NUM_REQUESTS
+        self.input_shape = list(input_shape)
+        self.input_buffers = [numpy.zeros(input_shape, dtype=numpy.uint8) for i in range(num_requests)]
+        self.outputs = [None] * num_requests
+        self.status = [0] * num_requests
+        self.done = [threading.Event() for i in range(num_requests)]
+        for done in self.done:
+            done.set()
+        self.executor = ThreadPoolExecutor(max_workers=num_requests)
+
+    def infer(self, request_id, frames):
+        """
+        Runs the model, on a thread of the pool.
+        :param request_id: Index of the infer request
+        :param frames: Input buffer of the request
+        :return: Output of the model
+        """
+        raise NotImplementedError
+
+    def _run(self, request_id):
+        try:
+            self.outputs[request_id] = self.infer(request_id, self.input_buffers[request_id])
+            self.status[request_id] = 0
+        except Exception as err:
+            log.error("Inference failed: {}".format(err))
+            self.status[request_id] = -1
+        self.done[request_id].set()
+        if self.callback:
+            self.callback(self.status[request_id], request_id)
+
+    def start(self, request_id):
+        self.done[request_id].clear()
+        self.executor.submit(self._run, request_id)
+
+    def wait(self, request_id):
+        self.done[request_id].wait()
+        return self.status[request_id]
+
+    def output(self, request_id, output=None):
+        return self.outputs[request_id]
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+
+
+class OpenCvBackend(ThreadedBackend):
+    """
+    Runs the model with the DNN module of OpenCV. The model is read by cv2.dnn.readNet(),
+    an IR is read with its .bin file. The input shape is read from the IR of the model,
+    the input resolution of the other formats is given to load().
+    cv2.dnn.Net is not thread safe, every infer request has its own copy of the network.
+    """
+
+    # Preferable backend and target of the devices
+    TARGETS = {"CPU": (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU),
+               "GPU": (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_OPENCL),
+               "MYRIAD": (cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE, cv2.dnn.DNN_TARGET_MYRIAD)}
+
+    def __init__(self):
+        super().__init__()
+        self.nets = []
+
+    def load(self, model, device, num_requests, batch_size=1, cpu_extension=None, plugin=None, cache_dir=None,
+             input_resolution=None):
+        if device not in self.TARGETS:
+            raise ValueError("Device {} is not supported by OpenCV".format(device))
+        if input_resolution:
+            input_shape = [batch_size, 3, input_resolution[1], input_resolution[0]]
+        elif model.endswith(".xml"):
+            input_shape = read_ir_input_shape(model)
+            input_shape[0] = batch_size
+        else:
+            raise ValueError("The input resolution of a model which is not an IR must be given")
+        weights = os.path.splitext(model)[0] + ".bin" if model.endswith(".xml") else ""
+        self.create_requests(num_requests, input_shape)
+        for i in range(self.num_requests):
+            try:
+                net = cv2.dnn.readNet(model, weights)
+            except cv2.error as err:
+                raise BackendError("OpenCV could not read {}: {}".format(model, err)) from err
+            net.setPreferableBackend(self.TARGETS[device][0])
+            net.setPreferableTarget(self.TARGETS[device][1])
+            self.nets.append(net)
+
+    def infer(self, request_id, frames):
+        net = self.nets[request_id]
+        net.setInput(frames.astype(numpy.float32))
+        return net.forward().reshape(1, 1, -1, 7)
+
+
+class OnnxBackend(ThreadedBackend):
+    """
+    Runs the model with ONNX Runtime. The .onnx file is looked for next to the model
+    given on the command line. All the infer requests share the same session.
+    With a cache directory, the model optimized for the host is saved there and
+    loaded as is on the next starts.
+    """
+
+    # Execution providers of the devices, in order of preference
+    PROVIDERS = {"CPU": ["CPUExecutionProvider"],
+                 "GPU": ["CUDAExecutionProvider", "CPUExecutionProvider"]}
+
+    def __init__(self):
+        super().__init__()
+        self.session = None
+        self.input_name = None
+        self.input_type = None
+
+    def load(self, model, device, num_requests, batch_size=1, cpu_extension=None, plugin=None, cache_dir=None,
+             input_resolution=None):
+        # Imported here so that the other backends run without ONNX Runtime
+        import onnxruntime
+        from onnxruntime.capi import onnxruntime_pybind11_state
+
+        if device not in self.PROVIDERS:
+            raise ValueError("Device {} is not supported by ONNX Runtime".format(device))
+        model = model_file(model, ".onnx")
+        options = onnxruntime.SessionOptions()
+        cache_file = None
+        if cache_dir:
+            cache_file = os.path.join(cache_dir, cache_key([model], {
+                'device': device, 'version': onnxruntime.__version__}) + ".onnx")
+            if os.path.isfile(cache_file):
+                # The cached model is already optimized
+                log.info("Loading the optimized model from {}...".format(cache_file))
+                model = cache_file
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+                cache_file = None
+            else:
+                os.makedirs(cache_dir, exist_ok=True)
+                options.optimized_model_filepath = cache_file + ".tmp"
+        # The errors of ONNX Runtime (Fail, NoSuchFile, InvalidArgument...) do not derive from RuntimeError
+        ort_errors = tuple(error for error in vars(onnxruntime_pybind11_state).values()
+                           if isinstance(error, type) and issubclass(error, Exception))
+        try:
+            self.session = onnxruntime.InferenceSession(model, options, providers=self.PROVIDERS[device])
+        except (RuntimeError,) + ort_errors as err:
+            raise BackendError("ONNX Runtime could not load {}: {}".format(model, err)) from err
+        if cache_file and os.path.isfile(cache_file + ".tmp"):
+            os.replace(cache_file + ".tmp", cache_file)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_type = numpy.uint8 if model_input.type == "tensor(uint8)" else numpy.float32
+        input_shape = list(model_input.shape)
+        if not all(isinstance(dim, int) for dim in input_shape[1:]):
+            raise ValueError("The input of the model must have a fixed size")
+        input_shape[0] = batch_size
+        self.create_requests(num_requests, input_shape)
+
+    def infer(self, request_id, frames):
+        res = self.session.run(None, {self.input_name: frames.astype(self.input_type, copy=False)})
+        return res[0].reshape(1, 1, -1, 7)
+
+
+class FakeBackend(ThreadedBackend):
+    """
+    Deterministic backend without a model, for tests and benchmarks of the pipeline.
+    A frame gets a number of detections given by the mean of its pixels, with boxes
+    side by side, so the same frames always give the same results.
+    """
+
+    def load(self, model, device, num_requests, batch_size=1, cpu_extension=None, plugin=None, cache_dir=None,
+             input_resolution=None):
+        model_xml = os.path.splitext(model)[0] + ".xml"
+        if input_resolution:
+            input_shape = [batch_size, 3, input_resolution[1], input_resolution[0]]
+        else:
+            input_shape = read_ir_input_shape(model_xml) if os.path.isfile(model_xml) else list(FAKE_INPUT_SHAPE)
+            input_shape[0] = batch_size
+        self.create_requests(num_requests, input_shape)
+
+    def infer(self, request_id, frames):
+        res = []
+        for image_id, frame in enumerate(frames):
+            for i in range(int(frame.mean()) % (FAKE_MAX_DETECTIONS + 1)):
+                left = i / FAKE_MAX_DETECTIONS
+                res.append([image_id, i + 1, 0.9, left, 0.25, left + 0.5 / FAKE_MAX_DETECTIONS, 0.75])
+        # The list of detections ends with an image ID of -1
+        res.append([-1, 0, 0, 0, 0, 0, 0])
+        return numpy.array(res, dtype=numpy.float32).reshape(1, 1, -1, 7)
+
+
+BACKENDS = {BACKEND_OPENVINO: OpenVinoBackend,
+            BACKEND_OPENCV: OpenCvBackend,
+            BACKEND_ONNX: OnnxBackend,
+            BACKEND_FAKE: FakeBackend}
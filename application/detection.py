@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import numpy
+
+
+def parse_detections(res, label_mask, thresholds, width, height, zones=None):
+    """
+    Selects the detections of an SSD output which belong to a used label and are over
+    the threshold of their label, all the detections of the frame at once. With zones,
+    only the detections standing in a zone, by the bottom center of their box, are selected.
+
+    :param res: Output of the network, of shape [1, 1, N, 7]
+    :param label_mask: Array of bool, true for the labels used in the application
+    :param thresholds: Array of the confidence threshold of every label
+    :param width: Width of the frame the boxes are scaled to
+    :param height: Height of the frame the boxes are scaled to
+    :param zones: Mask of the zones of the frame, None to select detections anywhere
+    :return labels: Label index of every selected detection
+            boxes: Array of xmin, ymin, xmax, ymax in pixels for every selected detection
+            counts: Number of selected detections for every label
+    """
+    dets = res[0][0]
+    labels = dets[:, 1].astype(numpy.int32) - 1
+    no_of_labels = len(label_mask)
+    # Labels outside the label file, like the -1 image ID ending the output, are never selected
+    valid = (labels >= 0) & (labels < no_of_labels)
+    clipped = numpy.clip(labels, 0, no_of_labels - 1)
+    keep = valid & label_mask[clipped] & (dets[:, 2] > thresholds[clipped])
+
+    labels = labels[keep]
+    boxes = (dets[keep, 3:7] * numpy.array([width, height, width, height], dtype=numpy.float32)).astype(numpy.int32)
+    if zones is not None:
+        x = numpy.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, zones.shape[1] - 1)
+        y = numpy.clip(boxes[:, 3], 0, zones.shape[0] - 1)
+        inside = zones[y, x] > 0
+        labels = labels[inside]
+        boxes = boxes[inside]
+    counts = numpy.bincount(labels, minlength=no_of_labels)
+    return labels, boxes, counts
+
+
+def region_to_frame(res, region, width, height):
+    """
+    Moves the detections inferred on a region of a frame to the coordinates of the frame.
+
+    :param res: Detections of the region, of shape [1, 1, N, 7], with normalized coordinates
+    :param region: x, y, width, height of the region in pixels, None for the whole frame
+    :param width: Width of the frame
+    :param height: Height of the frame
+    :return: Detections with coordinates normalized to the frame
+    """
+    res = res.copy()
+    if region is not None:
+        x, y, w, h = region
+        res[0, 0, :, 3:7] = (res[0, 0, :, 3:7] * numpy.array([w, h, w, h], dtype=numpy.float32) +
+                             numpy.array([x, y, x, y], dtype=numpy.float32)) / \
+            numpy.array([width, height, width, height], dtype=numpy.float32)
+    return res
+
+
+def _intersections(boxes_a, boxes_b):
+    """
+    :return: Intersection area of every pair of boxes of shape [A, B], area of every box of A and of B
+    """
+    boxes_a = numpy.asarray(boxes_a, dtype=numpy.float32).reshape(-1, 4)
+    boxes_b = numpy.asarray(boxes_b, dtype=numpy.float32).reshape(-1, 4)
+    top_left = numpy.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = numpy.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = numpy.prod(numpy.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = numpy.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = numpy.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return inter, area_a, area_b
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Computes the intersection over union of every pair of boxes of two arrays.
+
+    :param boxes_a: Array of xmin, ymin, xmax, ymax of shape [A, 4]
+    :param boxes_b: Array of xmin, ymin, xmax, ymax of shape [B, 4]
+    :return: Array of shape [A, B] with the IoU of every pair
+    """
+    inter, area_a, area_b = _intersections(boxes_a, boxes_b)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / numpy.maximum(union, 1e-6)
+
+
+def merge_detections(res, threshold, min_confidence=0):
+    """
+    Non-maximum suppression of the detections of overlapping regions of a frame. Of two
+    detections of the same label, the less confident one is dropped when most of the
+    smaller box lies in the other box: a box cut by the edge of a tile lies inside the
+    box of the neighbouring tile which saw the whole object.
+
+    :param res: Detections of the regions, of shape [1, 1, N, 7]
+    :param threshold: Fraction of the smaller box in the other box over which a detection is dropped
+    :param min_confidence: Detections below this confidence are dropped first
+    :return: Detections kept, of shape [1, 1, M, 7]
+    """
+    dets = res[0][0]
+    dets = dets[(dets[:, 0] >= 0) & (dets[:, 2] >= min_confidence)]
+    dets = dets[numpy.argsort(-dets[:, 2], kind='stable')]
+    inter, area, area = _intersections(dets[:, 3:7], dets[:, 3:7])
+    overlap = inter / numpy.maximum(numpy.minimum(area[:, None], area[None, :]), 1e-12)
+    suppress = (overlap > threshold) & (dets[:, 1][:, None] == dets[:, 1][None, :])
+    keep = numpy.ones(len(dets), dtype=bool)
+    for i in range(len(dets)):
+        if keep[i]:
+            keep[i + 1:] &= ~suppress[i, i + 1:]
+    return dets[keep][None, None]
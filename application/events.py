@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import json
+import logging as log
+import collections
+import sqlite3
+import threading
+from contextlib import closing
+
+
+def write_atomic(path, content):
+    """
+    Writes a file so that readers see either its previous or its new content, never a partial one.
+    :param path: Path of the file
+    :param content: Text to write
+    :return: None
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as tmp_file:
+        tmp_file.write(content)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, path)
+
+
+class TimelineRollup:
+    """
+    Counts the events of every video and label in buckets of video time, at several
+    resolutions, for example per second, minute and hour. The counts are updated as the
+    events are added, and every resolution is exported to its own JSON file, so that
+    the timeline of the UI loads only the resolution it displays. Every resolution keeps
+    the latest buckets of a video only, the oldest ones are dropped.
+    """
+
+    def __init__(self, timeline_file, resolutions, max_buckets):
+        """
+        :param timeline_file: Path of the JSON files, with a {} replaced by the resolution in seconds
+        :param resolutions: Bucket sizes in seconds, from the finest to the coarsest
+        :param max_buckets: Maximum number of buckets of a video at every resolution
+        """
+        self.timeline_file = timeline_file
+        self.resolutions = resolutions
+        self.max_buckets = max_buckets
+        # Count of every label per bucket of every video and resolution
+        self.buckets = {resolution: {} for resolution in resolutions}
+        self.changed = set()
+
+    def add(self, video, label, video_time):
+        """
+        Counts an event in its bucket of every resolution.
+        :param video: ID of the video in the UI
+        :param label: Label of the intruder
+        :param video_time: Time of the event in the video, in seconds
+        :return: None
+        """
+        for resolution in self.resolutions:
+            bucket = int(video_time // resolution) * resolution
+            buckets = self.buckets[resolution].setdefault(video, {})
+            labels = buckets.setdefault(bucket, {})
+            labels[label] = labels.get(label, 0) + 1
+            # The buckets are created in the order of the video time
+            while len(buckets) > self.max_buckets:
+                del buckets[next(iter(buckets))]
+            self.changed.add(resolution)
+
+    def export(self, totals):
+        """
+        Copies the resolutions changed since the last export. The copies are serialized
+        by the caller, outside of the lock under which the events are added.
+        :param totals: Total count of intruders of every video
+        :return: List of the paths and contents of the files to write
+        """
+        files = []
+        for resolution in sorted(self.changed):
+            videos = {video: {bucket: {"count": sum(labels.values()), "labels": dict(labels)}
+                              for bucket, labels in buckets.items()}
+                      for video, buckets in self.buckets[resolution].items()}
+            timeline = {"resolution": resolution, "videos": videos,
+                        "totals": {video: str(total) for video, total in totals.items()}}
+            files.append((self.timeline_file.format(resolution), timeline))
+        self.changed.clear()
+        return files
+
+
+class EventJournal:
+    """
+    Streams the intruder events to an append-only JSON Lines journal as they are confirmed,
+    and keeps the JSON files read by the browser UI up to date. The entries of the UI files
+    are serialized once, when their event is appended, and the files are rewritten
+    atomically on a timer, so the cost of a snapshot doesn't include re-encoding the events.
+    The UI files hold the latest events of every video, the full history is in the journal.
+    """
+
+    def __init__(self, journal_file, event_file, data_file, fsync_interval, snapshot_interval, max_entries,
+                 timeline=None):
+        """
+        :param journal_file: Path of the JSON Lines journal, appended to across runs
+        :param event_file: Path of the events JSON file of the UI
+        :param data_file: Path of the data JSON file of the UI
+        :param fsync_interval: Seconds between two syncs of the journal to disk
+        :param snapshot_interval: Seconds between two updates of the UI files
+        :param max_entries: Maximum number of events of a video in the UI files
+        :param timeline: TimelineRollup counting the events for the timeline of the UI, None for no timeline files
+        """
+        self.journal_file = journal_file
+        self.event_file = event_file
+        self.data_file = data_file
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.max_entries = max_entries
+        self.timeline = timeline
+        self.journal = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.seq = 0
+        self.synced = True
+        self.changed = True
+        # Serialized entries of the UI files per video
+        self.event_entries = {}
+        self.data_entries = {}
+        self.entry_counts = {}
+        self.totals = {}
+
+    def _last_seq(self):
+        """
+        Reads the sequence number of the last event journaled by a previous run.
+        :return: Sequence number of the last event, -1 if the journal is empty
+        """
+        if not os.path.isfile(self.journal_file):
+            return -1
+        with open(self.journal_file, 'rb') as journal:
+            journal.seek(0, os.SEEK_END)
+            journal.seek(max(journal.tell() - 4096, 0))
+            lines = journal.read().splitlines()
+        for line in reversed(lines):
+            try:
+                return json.loads(line.decode())["seq"]
+            except (ValueError, KeyError):
+                # Line cut by the start of the read, or by a crash while it was written
+                continue
+        return -1
+
+    def open(self):
+        """
+        Opens the journal and starts the thread syncing it and updating the UI files.
+        The sequence numbers continue from the events journaled by the previous runs.
+        :return: None
+        """
+        self.seq = self._last_seq() + 1
+        self.journal = open(self.journal_file, 'a')
+        if self.journal.tell() > 0:
+            with open(self.journal_file, 'rb') as journal:
+                journal.seek(-1, os.SEEK_END)
+                # The last line was cut by a crash, the events start on a new line
+                if journal.read() != b"\n":
+                    self.journal.write("\n")
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def append(self, video, cam_name, event, video_time):
+        """
+        Appends an event to the journal and to the entries of the UI files.
+        :param video: ID of the video in the UI
+        :param cam_name: Name of the video source
+        :param event: Event to append
+        :param video_time: Time of the event in the video, in seconds
+        :return: Sequence number of the event
+        """
+        record = {"seq": self.seq, "video": video, "camera": cam_name, "time": event.time,
+                  "label": event.intruder, "count": event.count, "frame": event.frame,
+                  "videoTime": video_time, "track": event.track_id, "clip": event.clip, "clipTime": event.clip_time}
+        event_entries = self.event_entries.setdefault(video, collections.deque(maxlen=self.max_entries))
+        data_entries = self.data_entries.setdefault(video, collections.deque(maxlen=self.max_entries))
+        entry_count = self.entry_counts.get(video, 0)
+        event_entry = '"{}":{}'.format(entry_count, json.dumps(
+            {"time": event.time, "content": event.intruder, "videoTime": "%d" % video_time}))
+        data_entry = '"%d":"%d"' % (video_time, event.count)
+        with self.lock:
+            self.journal.write(json.dumps(record) + "\n")
+            event_entries.append(event_entry)
+            data_entries.append(data_entry)
+            self.entry_counts[video] = entry_count + 1
+            self.totals[video] = event.count
+            if self.timeline:
+                self.timeline.add(video, event.intruder, video_time)
+            seq = self.seq
+            self.seq += 1
+            self.synced = False
+            self.changed = True
+        return seq
+
+    def sync(self):
+        """
+        Flushes the journal and syncs it to disk.
+        :return: None
+        """
+        with self.lock:
+            if self.synced:
+                return
+            self.journal.flush()
+            self.synced = True
+        os.fsync(self.journal.fileno())
+
+    def write_snapshot(self):
+        """
+        Rewrites the UI files atomically with all the events appended so far.
+        :return: None
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            videos = list(self.event_entries.keys())
+            events = [(video, ",".join(self.event_entries[video])) for video in videos]
+            data = [(video, ",".join(self.data_entries[video])) for video in videos]
+            totals = ",".join('"{}":"{}"'.format(video, self.totals[video]) for video in videos)
+            timeline_files = self.timeline.export(self.totals) if self.timeline else []
+            self.changed = False
+        try:
+            write_atomic(self.event_file, "{" + ",".join('"{}":{{{}}}'.format(video, entries)
+                                                         for video, entries in events) + "}")
+            write_atomic(self.data_file, "{" + "".join('"{}":{{{}}},'.format(video, entries)
+                                                       for video, entries in data) + '"totals":{' + totals + "}}")
+            for path, timeline in timeline_files:
+                write_atomic(path, json.dumps(timeline))
+        except Exception:
+            # Written again by the next snapshot
+            with self.lock:
+                self.changed = True
+                if self.timeline:
+                    self.timeline.changed.update(self.timeline.resolutions)
+            raise
+
+    def _run(self):
+        """
+        Syncs the journal and updates the UI files at their intervals until the journal is closed.
+        The errors are logged and the journal keeps running, they are retried at the next interval.
+        :return: None
+        """
+        next_snapshot = self.snapshot_interval
+        elapsed = 0
+        while not self.stop_event.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except Exception as err:
+                log.error("Could not sync the event journal: {}".format(err))
+            elapsed += self.fsync_interval
+            if elapsed >= next_snapshot:
+                next_snapshot += self.snapshot_interval
+                try:
+                    self.write_snapshot()
+                except Exception as err:
+                    log.error("Could not write the event files of the UI: {}".format(err))
+
+    def close(self):
+        """
+        Stops the thread, syncs the journal and writes the final UI files.
+        :return: None
+        """
+        if self.journal is None:
+            return
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.sync()
+        self.write_snapshot()
+        self.journal.close()
+        self.journal = None
+
+
+class EventStore:
+    """
+    Keeps the intruder events in a SQLite database, indexed by camera, label and time,
+    so that the history of long runs stays on disk instead of in memory. The events
+    are buffered and inserted in batches by a background thread, and the database is
+    in WAL mode so that queries from other threads or processes don't block the inserts.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, seq INTEGER, timestamp REAL NOT NULL, "
+        "video TEXT, camera TEXT NOT NULL, label TEXT NOT NULL, count INTEGER, frame INTEGER, "
+        "video_time REAL, track INTEGER, clip TEXT, clip_time REAL)",
+        "CREATE INDEX IF NOT EXISTS events_camera ON events (camera, timestamp)",
+        "CREATE INDEX IF NOT EXISTS events_label ON events (label, timestamp)",
+        "CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp)",
+        "CREATE INDEX IF NOT EXISTS events_seq ON events (seq)",
+    ]
+    COLUMNS = ["seq", "timestamp", "video", "camera", "label", "count", "frame", "video_time", "track", "clip",
+               "clip_time"]
+
+    def __init__(self, db_file, flush_interval):
+        """
+        :param db_file: Path of the SQLite database, appended to across runs
+        :param flush_interval: Seconds between two batches of inserts
+        """
+        self.db_file = db_file
+        self.flush_interval = flush_interval
+        self.db = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.pending = []
+
+    def open(self):
+        """
+        Opens the database, creating its table and indexes if needed, and starts the insert thread.
+        :return: None
+        """
+        # The connection is only used by the insert thread once opened, and by close()
+        self.db = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            for statement in self.SCHEMA:
+                self.db.execute(statement)
+            # Databases of older versions miss the latest columns
+            columns = [row[1] for row in self.db.execute("PRAGMA table_info(events)")]
+            for column, column_type in [("clip", "TEXT"), ("clip_time", "REAL")]:
+                if column not in columns:
+                    self.db.execute("ALTER TABLE events ADD COLUMN {} {}".format(column, column_type))
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def append(self, seq, video, cam_name, event, video_time):
+        """
+        Buffers an event until the next batch of inserts.
+        :param seq: Sequence number of the event in the journal
+        :param video: ID of the video in the UI
+        :param cam_name: Name of the video source
+        :param event: Event to append
+        :param video_time: Time of the event in the video, in seconds
+        :return: None
+        """
+        row = self.row(seq, video, cam_name, event, video_time)
+        with self.lock:
+            self.pending.append(row)
+
+    @staticmethod
+    def row(seq, video, cam_name, event, video_time):
+        """
+        Gives the values of the columns of an event.
+        :return: Tuple of the values, in the order of COLUMNS
+        """
+        return (seq, event.timestamp, video, cam_name, event.intruder, event.count, event.frame, video_time,
+                event.track_id, event.clip, event.clip_time)
+
+    def flush(self):
+        """
+        Inserts the buffered events in a single transaction.
+        :return: None
+        """
+        with self.lock:
+            rows = self.pending
+            self.pending = []
+        if not rows:
+            return
+        try:
+            with self.db:
+                self.db.executemany("INSERT INTO events ({}) VALUES ({})".format(
+                    ", ".join(self.COLUMNS), ", ".join("?" * len(self.COLUMNS))), rows)
+        except Exception:
+            # Inserted by the next batch
+            with self.lock:
+                self.pending = rows + self.pending
+            raise
+
+    def query(self, start=None, end=None, camera=None, label=None, limit=None):
+        """
+        Looks up the stored events. Can be called from any thread, every call reads
+        through its own connection.
+        :param start: Earliest time of the events, as a Unix timestamp
+        :param end: Time before which the events happened, as a Unix timestamp
+        :param camera: Name of the video source of the events
+        :param label: Label of the intruders
+        :param limit: Maximum number of events returned, the latest ones
+        :return: List of the events as dictionaries, oldest first
+        """
+        conditions, params = self._where(start, end, camera, label)
+        sql = "SELECT {} FROM events{} ORDER BY timestamp DESC".format(", ".join(self.COLUMNS), conditions)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._connect() as db:
+            rows = db.execute(sql, params).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in reversed(rows)]
+
+    def since(self, seq, limit):
+        """
+        Looks up the stored events from a sequence number on, to resume a stream of events.
+        :param seq: Sequence number of the first event
+        :param limit: Maximum number of events returned
+        :return: List of the events as dictionaries, in the order of their sequence numbers
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT {} FROM events WHERE seq >= ? ORDER BY seq LIMIT ?".format(
+                ", ".join(self.COLUMNS)), (seq, int(limit))).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def count(self, start=None, end=None, camera=None):
+        """
+        Counts the stored events of every label.
+        :param start: Earliest time of the events, as a Unix timestamp
+        :param end: Time before which the events happened, as a Unix timestamp
+        :param camera: Name of the video source of the events
+        :return: Dictionary of the number of events per label
+        """
+        conditions, params = self._where(start, end, camera, None)
+        with self._connect() as db:
+            rows = db.execute("SELECT label, COUNT(*) FROM events{} GROUP BY label".format(conditions),
+                              params).fetchall()
+        return dict(rows)
+
+    def _connect(self):
+        """
+        Opens a read connection to the database.
+        :return: sqlite3.Connection closed when leaving its with block
+        """
+        return closing(sqlite3.connect(self.db_file))
+
+    @staticmethod
+    def _where(start, end, camera, label):
+        """
+        Builds the WHERE clause of a query, using the indexes on camera, label and time.
+        :return: WHERE clause, and list of its parameters
+        """
+        conditions = []
+        params = []
+        for column, operator, value in [("camera", "=", camera), ("label", "=", label),
+                                        ("timestamp", ">=", start), ("timestamp", "<", end)]:
+            if value is not None:
+                conditions.append("{} {} ?".format(column, operator))
+                params.append(value)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def _run(self):
+        """
+        Inserts the buffered events at every interval until the store is closed.
+        The errors are logged and the events are inserted again at the next interval.
+        :return: None
+        """
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as err:
+                log.error("Could not store the events: {}".format(err))
+
+    def close(self):
+        """
+        Stops the insert thread, inserts the remaining events and closes the database.
+        :return: None
+        """
+        if self.db is None:
+            return
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.flush()
+        self.db.close()
+        self.db = None
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import collections
+import threading
+import time
+import cv2
+
+# Queue policies
+POLICY_DROP = "drop"
+POLICY_BLOCK = "block"
+POLICY_LATEST = "latest"
+POLICIES = [POLICY_DROP, POLICY_BLOCK, POLICY_LATEST]
+
+
+def keep_frame(idx, ratio):
+    """
+    Frame rate alignment: tells whether a frame is kept when only a fraction of the
+    frames of a source is processed. The kept frames are evenly spread.
+    :param idx: Index of the frame in the source
+    :param ratio: Fraction of the frames kept, the target frame rate over the frame rate of the source
+    :return: True if the frame is kept
+    """
+    return idx == 0 or int(idx * ratio) != int((idx - 1) * ratio)
+
+
+def open_capture(video, is_cam):
+    """
+    Opens a video source. Opening a camera or a stream can take seconds, the
+    sources are opened concurrently by the callers.
+    :param video: Path of the video file, or camera ID
+    :param is_cam: True if the source is a camera
+    :return: cv2.VideoCapture of the source
+    """
+    return cv2.VideoCapture(int(video) if is_cam else video)
+
+
+class FrameReader(threading.Thread):
+    """
+    Decodes the frames of a video source on its own thread into a bounded ring buffer.
+    When the buffer is full, the "drop" policy discards the oldest frame and the
+    "block" policy pauses decoding until the oldest frame is taken. The "latest"
+    policy is for live sources: the source is drained continuously and every new
+    frame replaces the frames not taken yet, which are counted as dropped.
+    """
+
+    def __init__(self, vc, frame_ratio, loop, queue_size, policy, frame_ready):
+        """
+        :param vc: Opened cv2.VideoCapture of the source
+        :param frame_ratio: Fraction of the frames of the source put in the buffer, may be changed while decoding
+        :param loop: Restart the source when it ends
+        :param queue_size: Maximum number of decoded frames kept in the buffer
+        :param policy: What to do when the buffer is full, "drop" or "block", or "latest" to keep only the newest frame
+        :param frame_ready: threading.Event set every time a frame is put in the buffer
+        """
+        super().__init__(daemon=True)
+        self.vc = vc
+        self.frame_ratio = frame_ratio
+        self.loop = loop
+        self.queue_size = queue_size
+        self.policy = policy
+        self.frame_ready = frame_ready
+        self.frames = collections.deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.ended = False
+        self.dropped_frames = 0
+        # Time the frame last taken out of the buffer was decoded at
+        self.frame_time = 0
+
+    def run(self):
+        if self.policy == POLICY_LATEST:
+            # Don't let frames age in the buffer of the capture either
+            self.vc.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        rewound = False
+        idx = 0
+        while not self.stopped:
+            # Frames skipped by the frame rate alignment are grabbed but not decoded
+            ret = self.vc.grab()
+            if ret and not keep_frame(idx, self.frame_ratio):
+                idx += 1
+                continue
+            idx += 1
+            frame = None
+            if ret:
+                ret, frame = self.vc.retrieve()
+            if not ret:
+                # Restart the source once, give up if it still has no frame
+                if self.loop and not rewound:
+                    self.vc.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                    continue
+                break
+            rewound = False
+            self._put(frame)
+
+        with self.cond:
+            self.ended = True
+        self.frame_ready.set()
+
+    def _put(self, frame):
+        """
+        Puts a frame in the buffer, applying the queue policy when the buffer is full.
+        :param frame: Decoded frame
+        :return: None
+        """
+        with self.cond:
+            while self.policy == POLICY_BLOCK and len(self.frames) >= self.queue_size and not self.stopped:
+                self.cond.wait()
+            if self.stopped:
+                # Woken up by stop(), the frame is neither queued nor dropped
+                return
+            if self.policy == POLICY_LATEST:
+                # The frames not taken yet are stale
+                self.dropped_frames += len(self.frames)
+                self.frames.clear()
+            elif len(self.frames) >= self.queue_size:
+                self.frames.popleft()
+                self.dropped_frames += 1
+            self.frames.append((time.time(), frame))
+        self.frame_ready.set()
+
+    def read(self):
+        """
+        Takes the oldest decoded frame out of the buffer without blocking.
+        :return: ret: False when the source has ended and all its frames were taken
+                 frame: Decoded frame, None if no frame is ready yet
+        """
+        with self.cond:
+            if self.frames:
+                self.frame_time, frame = self.frames.popleft()
+                self.cond.notify()
+                return True, frame
+            return not self.ended, None
+
+    def release(self):
+        """
+        Frames taken out of the buffer are never reused, there is nothing to give back.
+        :return: None
+        """
+        pass
+
+    def stop(self, wait=True):
+        """
+        Stops decoding and waits for the thread to exit.
+        :param wait: False to return without waiting, the thread may be stuck in a stalled source
+        :return: None
+        """
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if wait and self.is_alive():
+            self.join()
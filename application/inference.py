@@ -22,27 +22,31 @@
  WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-import os
-import sys
+import queue
+import collections
 import logging as log
-from openvino.inference_engine import IENetwork, IECore
+import cv2
+import numpy
+from backends import BACKENDS, BACKEND_OPENVINO
 
 
 class Network:
     """
     Load and configure inference plugins for the specified target devices 
     and performs synchronous and asynchronous modes for the specified infer requests.
+    The model runs on one of the inference backends of backends.py.
     """
 
-    def __init__(self):
-        self.net = None
-        self.plugin = None
-        self.input_blob = None
-        self.out_blob = None
-        self.net_plugin = None
-        self.infer_request_handle = None
+    def __init__(self, backend=BACKEND_OPENVINO):
+        self.backend = BACKENDS[backend]()
+        self.num_requests = 0
+        self.idle_requests = collections.deque()
+        self.completed_requests = queue.Queue()
+        self.input_buffers = []
+        self.resize_buffer = None
 
-    def load_model(self, model, device, input_size, output_size, num_requests, cpu_extension=None, plugin=None):
+    def load_model(self, model, device, input_size, output_size, num_requests, cpu_extension=None, plugin=None,
+                   batch_size=1, cache_dir=None, input_resolution=None):
         """
          Loads a network and an image to the Inference Engine plugin.
         :param model: .xml file of pre trained model
@@ -50,64 +54,47 @@ class Network:
         :param device: Target device
         :param input_size: Number of input layers
         :param output_size: Number of output layers
-        :param num_requests: Index of Infer request value. Limited to device capabilities.
+        :param num_requests: Number of infer requests in the pool. 0 lets the backend pick its optimal number.
         :param plugin: Plugin for specified device
+        :param batch_size: Number of frames inferred together by one infer request
+        :param cache_dir: Directory of the compiled models, None to compile the model on every start
+        :param input_resolution: Width and height of the input, None to read them from the model
         :return:  Shape of input layer
         """
+        self.backend.load(model, device, num_requests, batch_size, cpu_extension, plugin, cache_dir, input_resolution)
 
-        model_xml = model
-        model_bin = os.path.splitext(model_xml)[0] + ".bin"
-        # Plugin initialization for specified device
-        # and load extensions library if specified
-        if not plugin:
-            log.info("Initializing plugin for {} device...".format(device))
-            self.plugin = IECore()
-        else:
-            self.plugin = plugin
-
-        if cpu_extension and 'CPU' in device:
-            self.plugin.add_extension(cpu_extension, "CPU")
-
-        # Read IR
-        log.info("Reading IR...")
-        self.net = self.plugin.read_network(model=model_xml, weights=model_bin)
-        log.info("Loading IR to the plugin...")
-
-        if "CPU" in device:
-            supported_layers = self.plugin.query_network(self.net, "CPU")
-            not_supported_layers = \
-                [l for l in self.net.layers.keys() if l not in supported_layers]
-            if len(not_supported_layers) != 0:
-                log.error("Following layers are not supported by "
-                          "the plugin for specified device {}:\n {}".
-                          format(device,
-                                 ', '.join(not_supported_layers)))
-                log.error("Please try to specify cpu extensions library path"
-                          " in command line parameters using -l "
-                          "or --cpu_extension command line argument")
-                sys.exit(1)
-
-        if num_requests == 0:
-            # Loads network read from IR to the plugin
-            self.net_plugin = self.plugin.load_network(network=self.net, device_name=device)
-        else:
-            self.net_plugin = self.plugin.load_network(network=self.net, num_requests=num_requests, device_name=device)
-
-        self.input_blob = next(iter(self.net.inputs))
-        self.out_blob = next(iter(self.net.outputs))
-        assert len(self.net.inputs.keys()) == input_size, \
-            "Supports only {} input topologies".format(len(self.net.inputs))
-        assert len(self.net.outputs) == output_size, \
-            "Supports only {} output topologies".format(len(self.net.outputs))
-
-        return self.plugin, self.get_input_shape()
+        # Every infer request reports its completion to the ready-queue
+        self.backend.set_completion_callback(self._on_completion)
+        self.num_requests = self.backend.num_requests
+        self.idle_requests.extend(range(self.num_requests))
+        log.info("Created {} infer requests".format(self.num_requests))
+
+        # Frames are preprocessed straight into the input buffer of their infer request
+        self.input_buffers = self.backend.input_buffers
+        n, c, h, w = self.get_input_shape()
+        self.resize_buffer = numpy.empty((h, w, c), dtype=numpy.uint8)
+
+        return self.backend.plugin, self.get_input_shape()
+
+    def warm_up(self):
+        """
+        Runs every infer request once. Devices allocate and initialize lazily on the
+        first inference, which would otherwise slow down the first frames.
+        :return: None
+        """
+        for request_id in range(self.num_requests):
+            self.backend.start(request_id)
+        for request_id in range(self.num_requests):
+            self.backend.wait(request_id)
+            # Completions of the warm-up are not results
+            self.completed_requests.get()
 
     def get_input_shape(self):
         """
         Gives the shape of the input layer of the network.
         :return: None
         """
-        return self.net.inputs[self.input_blob].shape
+        return self.backend.input_shape
 
     def performance_counter(self, request_id):
         """
@@ -116,19 +103,69 @@ class Network:
         :param request_id: Index of Infer request value. Limited to device capabilities
         :return: Performance of the layer  
         """
-        perf_count = self.net_plugin.requests[request_id].get_perf_counts()
+        perf_count = self.backend.perf_counts(request_id)
         return perf_count
 
-    def exec_net(self, request_id, frame):
+    def preprocess(self, request_id, slot, frame):
+        """
+        Resizes a frame to the input size and writes it in NCHW layout into the input
+        blob of the specified request, without allocating any temporary array.
+        :param request_id: Index of Infer request value. Limited to device capabilities.
+        :param slot: Index of the frame in the batch
+        :param frame: Input image in HWC layout
+        :return: None
+        """
+        h, w = self.resize_buffer.shape[:2]
+        cv2.resize(frame, (w, h), dst=self.resize_buffer)
+        numpy.copyto(self.input_buffers[request_id][slot], self.resize_buffer.transpose((2, 0, 1)))
+
+    def exec_net(self, request_id, frame=None):
         """
         Starts asynchronous inference for specified request.
         :param request_id: Index of Infer request value. Limited to device capabilities.
-        :param frame: Input image
-        :return: Instance of Executable Network class
+        :param frame: Input image in NCHW layout, None to infer the frames already written by preprocess()
+        :return: None
+        """
+        if frame is not None:
+            numpy.copyto(self.input_buffers[request_id], frame)
+        self.backend.start(request_id)
+
+    def _on_completion(self, status, request_id):
+        """
+        Completion callback of the infer requests, runs on an Inference Engine thread.
+        :param status: Status code of the finished request
+        :param request_id: Index of the finished infer request
+        :return: None
+        """
+        self.completed_requests.put(request_id)
+
+    def get_idle_request(self):
+        """
+        Takes an infer request which is not running out of the pool.
+        :return: Index of the infer request, None if all the requests are busy
+        """
+        if not self.idle_requests:
+            return None
+        return self.idle_requests.popleft()
+
+    def release_request(self, request_id):
+        """
+        Gives an infer request whose results were consumed back to the pool.
+        :param request_id: Index of Infer request value. Limited to device capabilities.
+        :return: None
+        """
+        self.idle_requests.append(request_id)
+
+    def wait_completed(self, timeout=None):
+        """
+        Waits for any of the started infer requests to complete.
+        :param timeout: Time to wait in seconds, None to wait until a request completes
+        :return: Index of the completed infer request, None on timeout
         """
-        self.infer_request_handle = self.net_plugin.start_async(
-            request_id=request_id, inputs={self.input_blob: frame})
-        return self.net_plugin
+        try:
+            return self.completed_requests.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
     def wait(self, request_id):
         """
@@ -136,7 +173,7 @@ class Network:
         :param request_id: Index of Infer request value. Limited to device capabilities.
         :return: Timeout value
         """
-        wait_process = self.net_plugin.requests[request_id].wait(-1)
+        wait_process = self.backend.wait(request_id)
         return wait_process
 
     def get_output(self, request_id, output=None):
@@ -146,10 +183,7 @@ class Network:
         :param output: Name of the output layer
         :return: Results for the specified request
         """
-        if output:
-            res = self.infer_request_handle.outputs[output]
-        else:
-            res = self.net_plugin.requests[request_id].outputs[self.out_blob]
+        res = self.backend.output(request_id, output)
         return res
 
     def clean(self):
@@ -157,6 +191,5 @@ class Network:
         Deletes all the instances
         :return: None
         """
-        del self.net_plugin
-        del self.plugin
-        del self.net
+        self.backend.close()
+        del self.backend
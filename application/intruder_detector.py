@@ -23,7 +23,6 @@
 """
 
 from __future__ import print_function
-import sys
 import os
 from argparse import ArgumentParser
 import cv2
@@ -33,23 +32,94 @@ import collections
 import json
 import signal
 import pathlib
+import threading
+import math
+import sqlite3
 from inference import Network
+from backends import BACKENDS, BACKEND_OPENVINO, BackendError, parse_input_resolution
+from concurrent.futures import ThreadPoolExecutor
+from frame_reader import FrameReader, POLICIES, POLICY_BLOCK, POLICY_LATEST, open_capture
+from detection import parse_detections, region_to_frame, merge_detections
+from zones import parse_zone, zone_mask, crop_regions, parse_tiles, auto_tiles, tile_regions, TILES_AUTO
+from motion import MotionDetector
+from tracker import IouTracker
+from events import EventJournal, EventStore, TimelineRollup
+from writers import ClipRecorder, SnapshotWriter, VideoRecorder, SNAPSHOT_FORMATS
+from qos import QosController
+from live import EventStream, LiveServer
+from shard import ShardPool, shared_memory
 
 # CONSTANTS
 CONFIG_FILE = "../resources/config.json"
 EVENT_FILE = "../UI/resources/video_data/events.json"
 DATA_FILE = "../UI/resources/video_data/data.json"
+EVENT_JOURNAL = "../UI/resources/video_data/events.jsonl"
+EVENT_DB = "../UI/resources/video_data/events.db"
+UI_MAX_EVENTS = 1000
+TIMELINE_FILE = "../UI/resources/video_data/timeline_{}.json"
+RELOAD = True
+# Seconds between two checks of the modification time of the configuration file
+CONFIG_CHECK_INTERVAL = 1
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 0
+STREAM_BUFFER = 1000
+STREAM_KEEP_ALIVE = 15
+# Origin of the web pages allowed to read the live endpoint, empty for the same origin only
+STREAM_ORIGIN = ""
+# Bucket sizes of the timeline of the UI in seconds, per second, minute and hour
+TIMELINE_RESOLUTIONS = [1, 60, 3600]
+# Buckets of a video kept at every resolution, an hour of video per second
+TIMELINE_MAX_BUCKETS = 3600
+JOURNAL_FSYNC_INTERVAL = 1
+SNAPSHOT_INTERVAL = 5
+SNAPSHOT_FORMAT = "png"
+SNAPSHOT_QUALITY = None
+SNAPSHOT_WORKERS = 2
+SNAPSHOT_QUEUE_SIZE = 8
+RECORD_QUEUE_SIZE = 30
+RECORD_SCALE = 1
+RECORD_FPS = 0
+CLIPS = False
+CLIP_PRE_ROLL = 5
+CLIP_POST_ROLL = 5
+SHARDS = 0
+BACKEND = BACKEND_OPENVINO
+MODEL_CACHE = ""
+# Resolution of the model input as <width>x<height>, empty to read it from the model
+INPUT_RESOLUTION = ""
+OPEN_WORKERS = 16
+ANALYSIS_FPS = 0
+TILES = ""
+TILE_MERGE_THRESHOLD = 0.6
+LATENCY_BUDGET = 0
+
+# Quality degradations under overload, applied in this order
+QOS_OVERLAY = "no overlay"
+QOS_REGIONS = "whole frame instead of its regions"
+QOS_HALF_FPS = "half frame rate"
+QOS_QUARTER_FPS = "quarter frame rate"
 TARGET_DEVICE = "CPU"
 OUTPUT_VIDEO_PATH = "../UI/resources/videos"
+OUTPUT_CLIP_PATH = "output/clips"
 CPU_EXTENSION = ""
 LOOP_VIDEO = False
 UI = False
+HEADLESS = False
 CONF_THRESHOLD_VALUE = 0.55
 LOG_FILE_PATH = "./intruders.log"
 LOG_WIN_HEIGHT = 432
 LOG_WIN_WIDTH = 410
 CONF_CANDIDATE_CONFIDENCE = 4
 CODEC = 0x31637661
+NUM_REQUESTS = 0
+BATCH_SIZE = 1
+BATCH_WAIT_MS = 10
+MOTION_SENSITIVITY = 0
+MOTION_REFRESH = 30
+TRACKER = False
+INFER_INTERVAL = 1
+TRACK_MAX_AGE = 10
+FRAME_QUEUE_SIZE = 4
 
 # Opencv windows per each row
 CONF_WINDOW_COLUMNS = 2
@@ -61,56 +131,225 @@ conf_labels_file_path = ''
 accepted_devices = ["CPU", "GPU", "HETERO:FPGA,CPU", "MYRIAD", "HDDL"]
 video_caps = []
 is_async_mode = True
+infer_network = None
+in_flight = {}
+label_names = []
+used_labels = []
+label_mask = None
+label_thresholds = None
+conf_thresholds = {}
+log_list = None
+log_file = None
+event_journal = None
+event_store = None
+event_stream = None
+live_server = None
+# Sources being opened after a change of the configuration file
+reload_future = None
+config_mtime = None
+# Highest number of the video IDs of the sources of the run
+last_video_number = 0
+# Threads releasing the sources removed from the configuration file
+release_threads = []
+default_fps = 0
+snapshot_writer = None
+shard_pool = None
+stop_requested = False
+frame_ready = threading.Event()
+batch = []
+batch_request_id = None
+batch_start_time = 0
 
 
 # Event class to store the intruder details
 class Event:
-    def __init__(self, event_time=None, intruder=None, count=None, frame=None):
+    def __init__(self, event_time=None, intruder=None, count=None, frame=None, track_id=None, timestamp=None,
+                 clip=None, clip_time=0):
         self.time = event_time
+        self.timestamp = timestamp
+        self.clip = clip
+        self.clip_time = clip_time
         self.intruder = intruder
         self.count = count
         self.frame = frame
+        self.track_id = track_id
+
+
+# InferJob class to track a frame while its infer request is running
+class InferJob:
+    def __init__(self, frame, regions=None):
+        self.frame = frame
+        self.res = None
+        # Regions of the frame inferred separately, None for the whole frame
+        self.regions = regions or [None]
+        self.region_res = [None] * len(self.regions)
+        self.regions_left = len(self.regions)
+        self.done = False
+        self.start_time = time.time()
+        self.inf_time = 0
+        # Time the frame was decoded at
+        self.frame_time = time.time()
+        # Frames without motion are not inferred, they reuse the result of the previous frame
+        self.skipped = False
+        # Skipped by the motion gate, the frame is the same as the last inferred one
+        self.static = False
 
 
 # VideoCap class to manage the input source
 class VideoCap:
-    def __init__(self, vc, cam_name, cams, is_cam):
+    def __init__(self, vc, cam_name, cams, is_cam, queue_size=FRAME_QUEUE_SIZE, queue_policy=None,
+                 motion_sensitivity=0, motion_refresh=0, target_fps=0, zones=None, tiles=None):
         self.input_width = vc.get(3)
         self.input_height = vc.get(4)
+        self.fps = vc.get(cv2.CAP_PROP_FPS)
+        # Frame rate at which the frames are processed, set by the frame rate alignment
+        self.target_fps = target_fps
+        self.analysis_fps = self.fps
         self.vc = vc
         self.cam_name = cam_name
         self.is_cam = is_cam
         self.no_of_labels = 0
         self.last_correct_count = []
         self.total_count = []
-        self.current_count = []
+        self.current_count = None
         self.changed_count = []
         self.candidate_count = []
         self.candidate_confidence = []
         self.frame = None
-        self.loop_frames = 0
         self.frame_count = 0
-        self.events = []
-        self.video_name = 'video{}.mp4'.format(cams)
+        self.video_id = 'video{}'.format(cams)
+        self.video_name = self.video_id + '.mp4'
         self.vw = None
+        self.clips = None
+        self.pending = collections.deque()
+        self.last_output_time = time.time()
+        # Cameras drop their oldest frames, video files are never skipped
+        self.queue_size = queue_size
+        # Live cameras analyse their newest frame, video files every frame
+        self.queue_policy = queue_policy or (POLICY_LATEST if is_cam else POLICY_BLOCK)
+        self.reader = None
+        self.motion = None
+        if motion_sensitivity > 0:
+            self.motion = MotionDetector(motion_sensitivity, motion_refresh)
+        self.last_res = None
+        self.tracker = None
+        self.frames_since_inference = 0
+        self.open_time = 0
+        # Entry of the source in the configuration file
+        self.entry = None
+        # Set once the source has ended, or was removed from the configuration file
+        self.ended = False
+        self.removed = False
+        # Intruders are counted only in the zones, when the source has zones
+        self.zones = zones or []
+        self.zone_mask = None
+        self.tiles = tiles
+        self.regions = None
+        # Quality of the processing, lowered under overload by the QoS controller
+        self.qos = None
+        self.qos_steps = []
+        self.overlay = True
+        self.infer_regions = None
+        self.frame_ratio = 1
         
     def init(self, size):
         self.no_of_labels = size
+        # The first frame is always inferred
+        self.frames_since_inference = INFER_INTERVAL - 1
+        if TRACKER:
+            # Tracks are confirmed after as many frames as the candidate counts
+            min_hits = max(int(math.ceil(CONF_CANDIDATE_CONFIDENCE / INFER_INTERVAL)), 1)
+            self.tracker = IouTracker(min_hits, max(TRACK_MAX_AGE, INFER_INTERVAL))
         for i in range(size):
             self.last_correct_count.append(0)
             self.total_count.append(0)  
             self.changed_count.append(False)
-            self.current_count.append(0)
             self.candidate_count.append(0)
             self.candidate_confidence.append(0)
 
     def init_vw(self, h, w):
-        self.vw = cv2.VideoWriter(os.path.join(OUTPUT_VIDEO_PATH, self.video_name), CODEC,
-                                  self.vc.get(cv2.CAP_PROP_FPS), (w,h), True)
+        # Frames are encoded on the thread of the recorder
+        self.vw = VideoRecorder(os.path.join(OUTPUT_VIDEO_PATH, self.video_name), CODEC,
+                                self.analysis_fps, (w,h), RECORD_QUEUE_SIZE, RECORD_SCALE, RECORD_FPS)
         if not self.vw.isOpened():
             return -1, self.video_name
         return 0, ''
 
+    def init_clips(self, h, w):
+        # Only the frames around the events are encoded, on the thread of the recorder
+        self.clips = ClipRecorder(OUTPUT_CLIP_PATH, self.video_id, CODEC, self.analysis_fps, (w, h), CLIP_PRE_ROLL,
+                                  CLIP_POST_ROLL, RECORD_QUEUE_SIZE, RECORD_SCALE, RECORD_FPS)
+
+    def init_regions(self, input_width, input_height, max_tiles):
+        """
+        Prepares the mask of the zones and the regions of the frames inferred separately:
+        the regions cropped around the zones, or the whole frame, split into tiles when tiling.
+        The automatic tiling makes as many tiles as the infer requests take frames at once.
+        Raises ValueError when a zone is outside the frame.
+        """
+        width, height = int(self.input_width), int(self.input_height)
+        regions = [(0, 0, width, height)]
+        if self.zones:
+            self.zone_mask = zone_mask(self.zones, width, height)
+            regions = crop_regions(self.zones, width, height, input_width / input_height)
+        tiles = self.tiles or parse_tiles(TILES)
+        if tiles:
+            tiled = []
+            for x, y, w, h in regions:
+                cols, rows = tiles if tiles != TILES_AUTO else \
+                    auto_tiles(w, h, input_width, input_height, max(max_tiles // len(regions), 1))
+                tiled += tile_regions([(x, y, w, h)], cols, rows)
+            regions = [(x, y, w, h) for x, y, w, h in tiled if w > 0 and h > 0]
+        if regions != [(0, 0, width, height)]:
+            self.regions = regions
+        self.infer_regions = self.regions
+
+    def init_qos(self, budget):
+        """
+        Creates the QoS controller keeping the latency of the source within the budget,
+        with the quality degradations which make a difference for this source.
+        """
+        self.qos_steps = [QOS_OVERLAY]
+        if self.regions and len(self.regions) > 1:
+            self.qos_steps.append(QOS_REGIONS)
+        self.qos_steps += [QOS_HALF_FPS, QOS_QUARTER_FPS]
+        self.qos = QosController(budget, len(self.qos_steps) + 1)
+
+    def apply_quality(self, level):
+        """
+        Applies the degradations of a quality level, level 0 being the full quality.
+        """
+        steps = self.qos_steps[:level]
+        self.overlay = QOS_OVERLAY not in steps
+        self.infer_regions = None if QOS_REGIONS in steps else self.regions
+        frame_ratio = self.frame_ratio
+        if QOS_QUARTER_FPS in steps:
+            frame_ratio /= 4
+        elif QOS_HALF_FPS in steps:
+            frame_ratio /= 2
+        self.reader.frame_ratio = frame_ratio
+
+    def align_frame_rate(self, default_fps):
+        """
+        Sets the frame rate at which the frames of the source are processed, the target
+        frame rate of the source or the default one, never more than the source gives.
+        """
+        target_fps = self.target_fps or default_fps
+        if target_fps and self.fps:
+            self.analysis_fps = min(target_fps, self.fps)
+
+    def start_reader(self, loop):
+        self.frame_ratio = self.analysis_fps / self.fps if self.fps else 1
+        if shard_pool:
+            # The ring also holds the frames waiting for their results
+            slots = self.queue_size + infer_network.num_requests * BATCH_SIZE + 1
+            self.reader = shard_pool.start_reader(self.vc, self.frame_ratio, loop and not self.is_cam, slots,
+                                                  self.queue_policy)
+            return
+        self.reader = FrameReader(self.vc, self.frame_ratio, loop and not self.is_cam, self.queue_size,
+                                  self.queue_policy, frame_ready)
+        self.reader.start()
+
 
 def parse_args():
     """
@@ -124,11 +363,37 @@ def parse_args():
     global model_xml
     global model_bin
     global UI
+    global HEADLESS
     global CPU_EXTENSION
+    global NUM_REQUESTS
+    global BATCH_SIZE
+    global BATCH_WAIT_MS
+    global MOTION_SENSITIVITY
+    global MOTION_REFRESH
+    global TRACKER
+    global INFER_INTERVAL
+    global SNAPSHOT_FORMAT
+    global SNAPSHOT_QUALITY
+    global RECORD_SCALE
+    global RECORD_FPS
+    global CLIPS
+    global CLIP_PRE_ROLL
+    global CLIP_POST_ROLL
+    global STREAM_PORT
+    global STREAM_ORIGIN
+    global RELOAD
+    global SHARDS
+    global BACKEND
+    global MODEL_CACHE
+    global INPUT_RESOLUTION
+    global ANALYSIS_FPS
+    global TILES
+    global LATENCY_BUDGET
     global is_async_mode
     
     parser = ArgumentParser()
-    parser.add_argument("-m", "--model", help="Path to an .xml file with a trained model's weights.", 
+    parser.add_argument("-m", "--model", help="Path to an .xml file with a trained model's weights, or to the "
+                                              "model read by the opencv and onnx backends.",
                         required=True, type=str)
     parser.add_argument("-lb", "--labels", help="Labels mapping file", default=None, 
                         type=str, required=True)
@@ -137,11 +402,79 @@ def parse_args():
                                                "Default option is CPU.",
                         required=False, type=str)
     parser.add_argument("-lp", "--loop", help="Loop video to mimic continuous input.", type=str, default=None)
+    parser.add_argument("-be", "--backend", help="Inference runtime: openvino, opencv, onnx or fake. "
+                                                 "Default option is openvino.", default=BACKEND_OPENVINO, type=str)
+    parser.add_argument("-mc", "--model_cache", help="Directory where the model compiled for the device is cached "
+                                                     "to speed up the next starts. Disabled by default.",
+                        default="", type=str)
+    parser.add_argument("-ir", "--input_resolution", help="Resolution of the model input as <width>x<height>, "
+                                                          "needed by the opencv backend for the models which are "
+                                                          "not an IR. Read from the model by default.",
+                        default=INPUT_RESOLUTION, type=str)
     parser.add_argument("-l", "--cpu_extension",
                         help="MKLDNN (CPU)-targeted custom layers. Absolute path to a shared library with the kernels "
                         "impl.", type=str, default=None)
     parser.add_argument("-f", "--flag", help="sync or async", default="async", type=str)
     parser.add_argument("-ui", "--user_interface", help="User interface for the video samples", default="False", type=str)
+    parser.add_argument("-nr", "--num_requests", help="Number of infer requests shared by all the video sources. "
+                                                      "Default option 0 uses the optimal number for the device.",
+                        default=0, type=int)
+    parser.add_argument("-b", "--batch_size", help="Number of frames, from any of the video sources, inferred "
+                                                   "together by one infer request. Default option is 1.",
+                        default=1, type=int)
+    parser.add_argument("-bw", "--batch_wait", help="Maximum time in milliseconds a frame waits for its batch "
+                                                    "to fill. Default option is 10.",
+                        default=BATCH_WAIT_MS, type=int)
+    parser.add_argument("-mg", "--motion_gate", help="Fraction of the pixels which must change since the last "
+                                                     "inferred frame to infer a frame. Default option 0 infers "
+                                                     "every frame.", default=0, type=float)
+    parser.add_argument("-mr", "--motion_refresh", help="Maximum number of frames without motion skipped in a row. "
+                                                        "Default option is 30.", default=MOTION_REFRESH, type=int)
+    parser.add_argument("-tr", "--tracker", help="Follow the intruders with a tracker and count every new track "
+                                                 "once", default="False", type=str)
+    parser.add_argument("-ii", "--infer_interval", help="Infer one frame out of this number of frames of a video "
+                                                        "source. Default option is 1.", default=1, type=int)
+    parser.add_argument("-sf", "--snapshot_format", help="Image format of the snapshots of the intruders, png, jpg "
+                                                         "or webp. Default option is png.", default="png", type=str)
+    parser.add_argument("-sq", "--snapshot_quality", help="Compression level of png snapshots (0-9), quality of jpg "
+                                                          "and webp snapshots (0-100)", default=None, type=int)
+    parser.add_argument("-rs", "--record_scale", help="Scale factor of the videos recorded for the UI, for example "
+                                                      "0.5 for half their width and height. Default option is 1.",
+                        default=1, type=float)
+    parser.add_argument("-rf", "--record_fps", help="Maximum frame rate of the videos recorded for the UI. "
+                                                    "Default option 0 records every processed frame.",
+                        default=0, type=float)
+    parser.add_argument("-cl", "--clips", help="Record short clips around the intruder events in the "
+                                              "output/clips directory", default="False", type=str)
+    parser.add_argument("-pr", "--pre_roll", help="Seconds recorded in a clip before its event. Default option "
+                                                  "is 5.", default=CLIP_PRE_ROLL, type=float)
+    parser.add_argument("-po", "--post_roll", help="Seconds recorded in a clip after its last event. Default "
+                                                   "option is 5.", default=CLIP_POST_ROLL, type=float)
+    parser.add_argument("-sp", "--stream_port", help="Port of the local HTTP endpoint pushing the events as they "
+                                                     "are confirmed, on /events as Server-Sent Events and on /poll "
+                                                     "as long-poll. Disabled by default.", default=0, type=int)
+    parser.add_argument("-so", "--stream_origin", help="Origin of the web pages allowed to read the events of the "
+                                                       "local HTTP endpoint, for example http://localhost:8000. "
+                                                       "By default only pages of the endpoint itself can read them.",
+                        default=STREAM_ORIGIN, type=str)
+    parser.add_argument("-sh", "--shards", help="Number of worker processes decoding the video sources, the "
+                                                "frames are passed through shared memory. Default option 0 "
+                                                "decodes in the main process.", default=0, type=int)
+    parser.add_argument("-af", "--analysis_fps", help="Frame rate at which the frames of every video source are "
+                                                      "processed, the other frames are skipped without being "
+                                                      "decoded. Default option 0 uses the frame rate of the "
+                                                      "slowest source.", default=0, type=float)
+    parser.add_argument("-tl", "--tiles", help="Split the frames into overlapping tiles inferred separately, "
+                                               "\"<columns>x<rows>\" or \"auto\" for as many tiles as the infer "
+                                               "requests take at once. Disabled by default.", default="", type=str)
+    parser.add_argument("-lt", "--latency_budget", help="Latency budget in ms from the decoding of a frame to the "
+                                                        "end of its processing. Over the budget, the quality of the "
+                                                        "source is lowered step by step. Disabled by default.",
+                        default=0, type=float)
+    parser.add_argument("-rl", "--reload", help="Apply the changes of the configuration file while running. "
+                                               "Default option is true.", default="True", type=str)
+    parser.add_argument("-hl", "--headless", help="Run without any window, events, snapshots and JSON files are "
+                                                  "still produced", default="False", type=str)
     args = parser.parse_args()
     if args.model:
         model_xml = args.model
@@ -169,10 +502,64 @@ def parse_args():
         else:
             print("Invalid input for -ui/--user_interface. Defaulting to UI = False")     
             UI = False        
+    if args.tracker:
+        if args.tracker == "True" or args.tracker == "true":
+            TRACKER = True
+        elif args.tracker == "False" or args.tracker == "false":
+            TRACKER = False
+        else:
+            print("Invalid input for -tr/--tracker. Defaulting to TRACKER = False")
+            TRACKER = False
+    if args.clips:
+        if args.clips == "True" or args.clips == "true":
+            CLIPS = True
+        elif args.clips == "False" or args.clips == "false":
+            CLIPS = False
+        else:
+            print("Invalid input for -cl/--clips. Defaulting to CLIPS = False")
+            CLIPS = False
+    if args.reload:
+        if args.reload == "True" or args.reload == "true":
+            RELOAD = True
+        elif args.reload == "False" or args.reload == "false":
+            RELOAD = False
+        else:
+            print("Invalid input for -rl/--reload. Defaulting to RELOAD = True")
+            RELOAD = True
+    if args.headless:
+        if args.headless == "True" or args.headless == "true":
+            HEADLESS = True
+        elif args.headless == "False" or args.headless == "false":
+            HEADLESS = False
+        else:
+            print("Invalid input for -hl/--headless. Defaulting to HEADLESS = False")
+            HEADLESS = False
 
 
     if args.cpu_extension:
         CPU_EXTENSION = args.cpu_extension
+    if args.num_requests:
+        NUM_REQUESTS = args.num_requests
+    BATCH_SIZE = args.batch_size
+    BATCH_WAIT_MS = args.batch_wait
+    MOTION_SENSITIVITY = args.motion_gate
+    MOTION_REFRESH = args.motion_refresh
+    INFER_INTERVAL = args.infer_interval
+    SNAPSHOT_FORMAT = args.snapshot_format.lower()
+    SNAPSHOT_QUALITY = args.snapshot_quality
+    RECORD_SCALE = args.record_scale
+    RECORD_FPS = args.record_fps
+    CLIP_PRE_ROLL = args.pre_roll
+    CLIP_POST_ROLL = args.post_roll
+    STREAM_PORT = args.stream_port
+    STREAM_ORIGIN = args.stream_origin
+    SHARDS = args.shards
+    BACKEND = args.backend
+    MODEL_CACHE = args.model_cache
+    INPUT_RESOLUTION = args.input_resolution
+    ANALYSIS_FPS = args.analysis_fps
+    TILES = args.tiles
+    LATENCY_BUDGET = args.latency_budget
 
 
 def check_args():
@@ -190,6 +577,66 @@ def check_args():
     if conf_labels_file_path == '':
         return -3
 
+    if NUM_REQUESTS < 0:
+        print("Number of infer requests can't be negative")
+        return -18
+
+    if BATCH_SIZE < 1 or BATCH_WAIT_MS < 0:
+        print("Batch size must be at least 1 and batch wait can't be negative")
+        return -20
+
+    if not 0 <= MOTION_SENSITIVITY <= 1 or MOTION_REFRESH < 0:
+        print("Motion gate must be between 0 and 1 and motion refresh can't be negative")
+        return -22
+
+    if INFER_INTERVAL < 1:
+        print("Infer interval must be at least 1")
+        return -23
+
+    if SNAPSHOT_FORMAT not in SNAPSHOT_FORMATS:
+        print("Unsupported snapshot format: " + SNAPSHOT_FORMAT)
+        return -25
+
+    if not 0 < RECORD_SCALE <= 1 or RECORD_FPS < 0:
+        print("Record scale must be between 0 and 1 and record frame rate can't be negative")
+        return -26
+
+    if not 0 <= STREAM_PORT <= 65535:
+        print("Stream port must be between 1 and 65535, or 0 to disable the endpoint")
+        return -36
+
+    if CLIP_PRE_ROLL < 0 or CLIP_POST_ROLL < 0:
+        print("Pre-roll and post-roll of the clips can't be negative")
+        return -35
+
+    if SHARDS < 0 or (SHARDS and shared_memory is None):
+        print("Number of shards can't be negative, and shards need Python 3.8 or newer")
+        return -27
+
+    if ANALYSIS_FPS < 0:
+        print("Analysis frame rate can't be negative")
+        return -30
+
+    try:
+        parse_tiles(TILES)
+    except ValueError:
+        print("Tiles must be auto or <columns>x<rows>")
+        return -31
+
+    if LATENCY_BUDGET < 0:
+        print("Latency budget can't be negative")
+        return -32
+
+    if BACKEND not in BACKENDS:
+        print("Unsupported backend: " + BACKEND)
+        return -28
+
+    try:
+        parse_input_resolution(INPUT_RESOLUTION)
+    except ValueError:
+        print("Input resolution must be <width>x<height>")
+        return -39
+
     if 'MULTI' not in TARGET_DEVICE and TARGET_DEVICE not in accepted_devices:
         print("Unsupported device: " + TARGET_DEVICE)
         return -17
@@ -236,92 +683,219 @@ def get_used_labels(req_labels):
     return [-6, [], []]
 
 
-def get_input():
+def get_label_thresholds(labels):
+    """
+    Get the confidence threshold of every label from the configuration file
+
+    :param labels: list of labels present in model's label file
+    :return status: 0 on success, negative value on failure
+            thresholds: On success, array of the confidence threshold of every label
+    """
+    global conf_thresholds
+    thresholds = numpy.full(len(labels), CONF_THRESHOLD_VALUE, dtype=numpy.float32)
+
+    # A single threshold applies to all the labels, otherwise it is given per label
+    if isinstance(conf_thresholds, dict):
+        for label, threshold in conf_thresholds.items():
+            if label not in labels:
+                return [-21, label]
+            thresholds[labels.index(label)] = threshold
+    else:
+        thresholds[:] = conf_thresholds
+    return [0, thresholds]
+
+
+def apply_labels(req_labels, thresholds):
+    """
+    Set the labels detected by the application and their confidence thresholds
+
+    :param req_labels: intruders to be detected in the input sources
+    :param thresholds: confidence thresholds of the configuration file
+    :return status: 0 on success, negative value on failure
+            value: On failure, the faulty value
+    """
+    global label_names
+    global used_labels
+    global label_mask
+    global label_thresholds
+    global conf_thresholds
+    ret, labels, labels_used = get_used_labels(req_labels)
+    if ret != 0:
+        return ret, ''
+    if True not in labels_used:
+        return -15, ''
+    # The counts of the sources are kept per label of the label file
+    if label_names and labels != label_names:
+        return -6, ''
+    previous_thresholds = conf_thresholds
+    conf_thresholds = thresholds
+    ret, value = get_label_thresholds(labels)
+    if ret != 0:
+        conf_thresholds = previous_thresholds
+        return ret, value
+    label_names = labels
+    used_labels = labels_used
+    label_mask = numpy.array(used_labels, dtype=bool)
+    label_thresholds = value
+    return 0, ''
+
+
+def read_config():
     """
     Parse the configuration file
 
     :return status: 0 on success, negative value on failure
-            streams: On success, list of VideoCap containing configuration file data
+            sources: On success, list of the video path or camera ID, camera flag, name, number,
+                     options and configuration entry of every source. On failure, the faulty value.
             labels: On success, labels or intruder to be detected
+            thresholds: On success, confidence thresholds of the configuration file
     """
     global CONFIG_FILE
-    global video_caps
     labels = []
-    streams = []
+    thresholds = {}
+    sources = []
 
     assert os.path.isfile(CONFIG_FILE), "{} file doesn't exist".format(CONFIG_FILE)
     config = json.loads(open(CONFIG_FILE).read())
     for id, item in enumerate(config['inputs']):
-        for idx, video in enumerate(item['video']):
+        videos = item['video']
+        if not isinstance(videos, list):
+            videos = [videos]
+        for idx, video in enumerate(videos):
             cams = idx + 1
             cam_name = "Cam {}".format(idx)
-            if video.isdigit():
-                video_cap = VideoCap(cv2.VideoCapture(int(video)), cam_name, cams, is_cam=True)
-            else:
-                if os.path.isfile(video):
-                    video_cap = VideoCap(cv2.VideoCapture(video), cam_name, cams, is_cam=False)
-                else:
-                    return [-8, [video]]
-            video_caps.append(video_cap)
+            # Entry of the source in the configuration file, which identifies it on reload
+            entry = json.dumps(video, sort_keys=True)
+            # A video is either its path/camera ID or an object with per source options
+            options = {}
+            if isinstance(video, dict):
+                options = video
+                video = options['source']
+            queue_size = int(options.get('queue_size', FRAME_QUEUE_SIZE))
+            queue_policy = options.get('queue_policy')
+            target_fps = float(options.get('fps', 0))
+            if queue_size < 1 or (queue_policy and queue_policy not in POLICIES) or target_fps < 0:
+                return [-19, video, [], {}]
+            try:
+                zones = [parse_zone(zone) for zone in options.get('zones', [])]
+                tiles = parse_tiles(options.get('tiles'))
+            except (TypeError, ValueError):
+                return [-19, video, [], {}]
+            video_options = {'queue_size': queue_size, 'queue_policy': queue_policy, 'target_fps': target_fps,
+                             'zones': zones, 'tiles': tiles,
+                             'motion_sensitivity': float(options.get('motion_gate', MOTION_SENSITIVITY)),
+                             'motion_refresh': int(options.get('motion_refresh', MOTION_REFRESH))}
+            is_cam = video.isdigit()
+            if not is_cam and not os.path.isfile(video):
+                return [-8, video, [], {}]
+            sources.append((video, is_cam, cam_name, cams, video_options, entry))
         labels = item['label']
+        thresholds = item.get('threshold', {})
+        # A single threshold for all the labels, or one per label
+        for label, threshold in (thresholds.items() if isinstance(thresholds, dict) else [('', thresholds)]):
+            if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 <= threshold <= 1:
+                return [-38, "{} {}".format(label, threshold).strip(), [], {}]
+    return [0, sources, labels, thresholds]
+
+
+def open_sources(sources):
+    """
+    Open the video sources concurrently, in the decode worker processes when sharding
+
+    :param sources: Sources given by read_config()
+    :return: List of VideoCap of the sources, in the same order
+    """
+    global shard_pool
+    if SHARDS:
+        shard_pool = ShardPool(SHARDS)
+        captures = [(vc, vc.open_time) for vc in
+                    shard_pool.open([(video, is_cam) for video, is_cam, cam_name, cams, video_options, entry
+                                     in sources])]
+    else:
+        with ThreadPoolExecutor(max_workers=max(min(len(sources), OPEN_WORKERS), 1)) as executor:
+            captures = list(executor.map(lambda source: open_timed(*source[:2]), sources))
+    new_caps = []
+    for (video, is_cam, cam_name, cams, video_options, entry), (vc, open_time) in zip(sources, captures):
+        video_cap = VideoCap(vc, cam_name, cams, is_cam=is_cam, **video_options)
+        video_cap.open_time = open_time
+        video_cap.entry = entry
+        new_caps.append(video_cap)
+    return new_caps
+
+
+def get_input():
+    """
+    Parse the configuration file and open the sources
+
+    :return status: 0 on success, negative value on failure
+            labels: On success, labels or intruder to be detected
+    """
+    global video_caps
+    global conf_thresholds
+
+    ret, sources, labels, conf_thresholds = read_config()
+    if ret != 0:
+        return [ret, [sources]]
+    video_caps.extend(open_sources(sources))
 
     for video_cap in video_caps:
         if not video_cap.vc.isOpened():
             return [-9, [video_cap.cam_name]]
-
-        video_cap.init(len(labels))
     return [0, labels]
 
 
+def open_timed(video, is_cam):
+    """
+    Open a video source and record how long it took
+
+    :param video: Path of the video file, or camera ID
+    :param is_cam: True if the source is a camera
+    :return: cv2.VideoCapture of the source, open time in seconds
+    """
+    start_time = time.time()
+    vc = open_capture(video, is_cam)
+    return vc, time.time() - start_time
+
+
+def load_model():
+    """
+    Load the model to the inference backend and run every infer request once, so that
+    the first frames are inferred with the steady-state latency
+
+    :return: Shape of the input layer, load time and warm-up time in seconds
+    """
+    global infer_network
+    start_time = time.time()
+    infer_network = Network(BACKEND)
+    input_shape = infer_network.load_model(model_xml, TARGET_DEVICE, 1, 1, NUM_REQUESTS, CPU_EXTENSION,
+                                           batch_size=BATCH_SIZE, cache_dir=MODEL_CACHE or None,
+                                           input_resolution=parse_input_resolution(INPUT_RESOLUTION))[1]
+    load_time = time.time() - start_time
+    start_time = time.time()
+    infer_network.warm_up()
+    return input_shape, load_time, time.time() - start_time
+
+
 def save_json():
     """
-    Write the video results to json files
+    Sync the event journal, write the final JSON files of the UI and insert the
+    last events in the event store
 
     :return status: 0 on success, negative value on failure
     """
-    global video_caps
-    global EVENT_FILE
-    global DATA_FILE
-    events = []
-    if video_caps:
-        events = video_caps[0].events
-    total = 0
-    event_json = open(EVENT_FILE, 'w')
-    if not event_json:
+    global event_journal
+    global event_store
+    if event_store is not None:
+        try:
+            event_store.close()
+        except sqlite3.Error:
+            return -34
+    if event_journal is None:
+        return 0
+    try:
+        event_journal.close()
+    except OSError:
         return -10
-
-    data_json = open(DATA_FILE, 'w')
-    if not data_json:
-        return -11
-
-    data_json.write("{\n\t\"video1\": {\n")
-    event_json.write("{\n\t\"video1\": {\n")
-    events_size = len(events) - 1
-    if events:
-        fps = video_caps[0].vc.get(cv2.CAP_PROP_FPS)
-        for i in range(events_size):
-            event_json.write("\t\t\"%d\":{\n" % (i))
-            event_json.write("\t\t\t\"time\":\"%s\",\n" % events[i].time)
-            event_json.write("\t\t\t\"content\":\"%s\",\n" % events[i].intruder)
-            event_json.write("\t\t\t\"videoTime\":\"%d\"\n" % float(events[i].frame / fps))
-            event_json.write("\t\t},\n")
-            data_json.write("\t\t\"%d\": \"%d\",\n" % (float(events[i].frame / fps), events[i].count))      
-        event_json.write("\t\t\"%d\":{\n" % events_size)
-        event_json.write("\t\t\t\"time\":\"%s\",\n" % events[events_size].time)
-        event_json.write("\t\t\t\"content\":\"%s\",\n" % events[events_size].intruder)
-        event_json.write("\t\t\t\"videoTime\":\"%d\"\n" % float(events[events_size].frame / fps))
-        event_json.write("\t\t}\n")
-        data_json.write("\t\t\"%d\": \"%d\"\n" % (float(events[events_size].frame / fps), events[events_size].count))
-        total = events[events_size].count
-    event_json.write("\t}\n")
-    event_json.write("}")
-    data_json.write("\t},\n")
-    data_json.write("\t\"totals\":{\n")
-    data_json.write("\t\t\"video1\": \"%d\"\n" % total)
-    data_json.write("\t}\n")
-    data_json.write("}")
-    event_json.close()
-    data_json.close()
     return 0
 
 
@@ -361,19 +935,44 @@ def arrange_windows():
 
 # Signal handler
 def signal_handler(sig, frame):
-    global video_caps
-    global EVENT_FILE
-    global DATA_FILE
-    if video_caps:
-        ret = save_json()
-        if ret != 0:
-            if ret == -10:
-                print("Could not create event JSON file " + EVENT_FILE + "!")
-            elif ret == -11:
-                print("Could not create data JSON file " + DATA_FILE + "!")
+    global stop_requested
+    # The main loop stops after its current iteration, then syncs the events and cleans up.
+    # Nothing else is done here, the interrupted code may hold the locks of the threads.
+    stop_requested = True
 
-    clean_up()
-    sys.exit(0)
+
+def release_source(video_cap):
+    """
+    Stops decoding a source and releases its capture and recorders
+
+    :param video_cap: VideoCap of the source
+    :return: None
+    """
+    if video_cap.reader:
+        video_cap.reader.stop()
+        if video_cap.reader.dropped_frames:
+            if video_cap.queue_policy == POLICY_LATEST:
+                print("{} stale frames of {} were dropped to analyse the newest frames".format(
+                    video_cap.reader.dropped_frames, video_cap.cam_name))
+            else:
+                print("{} frames of {} were dropped, the analysis could not keep up".format(
+                    video_cap.reader.dropped_frames, video_cap.cam_name))
+    if video_cap.vw:
+        video_cap.vw.release()
+        if video_cap.vw.dropped_frames:
+            print("{} frames of {} were not recorded, the encoder could not keep up".format(
+                video_cap.vw.dropped_frames, video_cap.cam_name))
+        video_cap.vw = None
+    if video_cap.clips:
+        video_cap.clips.release()
+        if video_cap.clips.dropped_frames:
+            print("{} frames of the clips of {} were not recorded, the encoder could not keep up".format(
+                video_cap.clips.dropped_frames, video_cap.cam_name))
+        if video_cap.clips.failed_clips:
+            print("{} clips of {} could not be written".format(video_cap.clips.failed_clips, video_cap.cam_name))
+        video_cap.clips = None
+    if video_cap.vc:
+        video_cap.vc.release()
 
 
 def clean_up():
@@ -381,12 +980,457 @@ def clean_up():
     Destroys all the opencv windows and releases the objects of videoCapture and videoWriter
     """
     global video_caps
-    cv2.destroyAllWindows()
+    global snapshot_writer
+    global shard_pool
+    global live_server
+    if not HEADLESS:
+        cv2.destroyAllWindows()
+    if live_server:
+        live_server.stop()
+        live_server = None
+    if snapshot_writer:
+        snapshot_writer.close()
+        snapshot_writer = None
     for video_cap in video_caps:
+        release_source(video_cap)
+    for release_thread in release_threads:
+        release_thread.join()
+    if shard_pool:
+        shard_pool.stop()
+        shard_pool = None
+
+
+def process_output(video_cap, job):
+    """
+    Count the intruders detected in a frame, log the new ones and display the frame
+
+    :param video_cap: VideoCap the frame was read from
+    :param job: InferJob holding the frame and the output of the network
+    :return: None
+    """
+    global CONF_CANDIDATE_CONFIDENCE
+    global LOG_WIN_HEIGHT
+    global LOG_WIN_WIDTH
+    global is_async_mode
+    global UI
+    global LOOP_VIDEO
+
+    frame = job.frame
+    video_cap.changed_count = [False] * video_cap.no_of_labels
+
+    if job.res is not None:
+        video_cap.last_res = job.res
+        # Keep the objects of the used labels whose probability is more than the threshold of their label
+        labels, boxes, video_cap.current_count = parse_detections(job.res, label_mask, label_thresholds,
+                                                                  video_cap.input_width, video_cap.input_height,
+                                                                  video_cap.zone_mask)
+
+    if video_cap.tracker is not None:
+        # The tracker follows the intruders between the inferred frames
+        if job.res is None:
+            video_cap.tracker.predict()
+            confirmed = []
+        else:
+            confirmed = video_cap.tracker.update(labels, boxes)
+        tracks = video_cap.tracker.active_tracks()
+        boxes = numpy.array([track.box for track in tracks], dtype=numpy.int32).reshape(-1, 4)
+        video_cap.current_count = numpy.bincount([track.label for track in tracks],
+                                                 minlength=video_cap.no_of_labels)
+
+    # New intruders of the frame, reported once their boxes are drawn so that the snapshots show them
+    new_intruders = []
+    if video_cap.tracker is not None:
+        # Every new track is a new intruder
+        for track in confirmed:
+            video_cap.changed_count[track.label] = True
+            new_intruders.append((track.label, 1, track.track_id))
+    else:
+        # Without tracker, a count is confirmed once it stayed the same on several frames
+        for i in range(video_cap.no_of_labels):
+            if video_cap.candidate_count[i] == video_cap.current_count[i]:
+                video_cap.candidate_confidence[i] += 1
+            else:
+                video_cap.candidate_confidence[i] = 0
+                video_cap.candidate_count[i] = video_cap.current_count[i]
+
+            if video_cap.candidate_confidence[i] == CONF_CANDIDATE_CONFIDENCE:
+                video_cap.candidate_confidence[i] = 0
+                video_cap.changed_count[i] = True
+            else:
+                continue
+
+            if video_cap.current_count[i] > video_cap.last_correct_count[i]:
+                det_objs = video_cap.current_count[i] - video_cap.last_correct_count[i]
+                new_intruders.append((i, det_objs, None))
+            video_cap.last_correct_count[i] = video_cap.current_count[i]
+
+    # Draw bounding box around the intruders detected, only on the frames which are
+    # displayed, recorded or saved as a snapshot
+    recorded = (UI and not LOOP_VIDEO) or video_cap.clips
+    if video_cap.overlay and (not HEADLESS or recorded or new_intruders):
+        for xmin, ymin, xmax, ymax in boxes.tolist():
+            cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), (0, 255, 0), 4, 16)
+        if video_cap.zones:
+            cv2.polylines(frame, video_cap.zones, True, (0, 0, 255), 2)
+
+    for label, det_objs, track_id in new_intruders:
+        report_intruders(video_cap, label, det_objs, frame, track_id=track_id)
+
+    video_cap.frame_count += 1
+
+    # Video output, the recordings and the clips keep every frame under overload too
+    if UI and not LOOP_VIDEO:
+        video_cap.vw.write(frame)
+    if video_cap.clips:
+        video_cap.clips.write(frame)
+
+    # Nothing is displayed under overload or in headless mode
+    if not video_cap.overlay or HEADLESS:
+        return
+
+    # Create intruder log window, add logs to the frame and display it
+    log_window = numpy.zeros((LOG_WIN_HEIGHT, LOG_WIN_WIDTH, 1), dtype='uint8')
+    for i, log in enumerate(log_list):
+        cv2.putText(log_window, log, (10, 20 * i + 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.imshow("Intruder Log", log_window)
+
+    log_message = "Async mode is on." if is_async_mode else \
+        "Async mode is off."
+    cv2.putText(frame, log_message, (10, int(video_cap.input_height) - 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 10, 10), 1)
+    inf_time_message = "Inference time: N\A for async mode" if is_async_mode else \
+        "Inference time: {:.3f} ms".format(job.inf_time * 1000)
+    cv2.putText(frame, inf_time_message, (10, int(video_cap.input_height) - 30),
+                cv2.FONT_HERSHEY_COMPLEX, 0.5, (200, 10, 10), 1)
+    fps_time = time.time() - video_cap.last_output_time
+    video_cap.last_output_time = time.time()
+    fps_message = "FPS: {:.3f} fps".format(1/fps_time)
+    cv2.putText(frame, fps_message, (10, int(video_cap.input_height) - 10),
+                cv2.FONT_HERSHEY_COMPLEX, 0.5, (200, 10, 10), 1)
+
+    # Display the video output
+    cv2.imshow(video_cap.cam_name, frame)
+
+
+def add_to_batch(video_cap, job):
+    """
+    Preprocess a frame into the input of the infer request of the current batch.
+    Every region of the frame takes its own slot of the batch. The first region of a
+    batch takes an idle infer request for the batch, waiting for a running request to
+    complete when all of them are busy. The batch is started as soon as it is full.
+
+    :param video_cap: VideoCap the frame was read from
+    :param job: InferJob of the frame
+    :return: None
+    """
+    global infer_network
+    global batch
+    global batch_request_id
+    global batch_start_time
+
+    for region_idx, region in enumerate(job.regions):
+        if not batch:
+            # Wait until one of the infer requests is idle
+            batch_request_id = infer_network.get_idle_request()
+            while batch_request_id is None:
+                collect_result(infer_network.wait_completed())
+                batch_request_id = infer_network.get_idle_request()
+            batch_start_time = time.time()
+
+        # Resize to expected size (in model .xml file) straight into the input of the request
+        frame = job.frame
+        if region is not None:
+            x, y, w, h = region
+            frame = frame[y:y + h, x:x + w]
+        infer_network.preprocess(batch_request_id, len(batch), frame)
+        batch.append((video_cap, job, region_idx))
+        if len(batch) == BATCH_SIZE:
+            submit_batch()
+
+
+def submit_batch():
+    """
+    Start inference of the frames collected in the batch. Slots of the batch
+    without a frame keep their previous input, their detections are ignored.
+
+    :return: None
+    """
+    global infer_network
+    global in_flight
+    global batch
+
+    for video_cap, job, region_idx in batch:
+        job.start_time = time.time()
+
+    # Start asynchronous inference for specified request.
+    in_flight[batch_request_id] = batch
+    infer_network.exec_net(batch_request_id)
+    batch = []
+
+
+def submit_late_batch():
+    """
+    Start inference of an incomplete batch once its first frame waited for BATCH_WAIT_MS.
+
+    :return: None
+    """
+    if batch and (time.time() - batch_start_time) * 1000 >= BATCH_WAIT_MS:
+        submit_batch()
+
+
+def report_intruders(video_cap, label, det_objs, frame, track_id=None):
+    """
+    Count, log and save a snapshot of new intruders of a label
+
+    :param video_cap: VideoCap the intruders were detected on
+    :param label: Index of the label of the intruders
+    :param det_objs: Number of new intruders
+    :param frame: Frame the intruders were detected on
+    :param track_id: ID of the track following the intruder, if any
+    :return: None
+    """
+    video_cap.total_count[label] += int(det_objs)
+    total_count = sum(video_cap.total_count)
+    for det_obj in range(det_objs):
+        timestamp = time.time()
+        current_time = time.strftime("%H:%M:%S", time.localtime(timestamp))
+        clip, clip_time = None, 0
+        if video_cap.clips:
+            clip_name = "{}-{:03d}".format(time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp)),
+                                           int(timestamp * 1000) % 1000)
+            clip, clip_time = video_cap.clips.trigger(clip_name)
+        log = "{} - Intruder {} detected on {}".format(current_time, label_names[label], video_cap.cam_name)
+        log_list.append(log)
+        log_file.write(log + "\n")
+        event = Event(event_time=current_time, intruder=label_names[label], count=total_count,
+                      frame=video_cap.frame_count, track_id=track_id, timestamp=timestamp, clip=clip,
+                      clip_time=clip_time)
+        # Position in the recording, which misses the frames not recorded under overload
         if video_cap.vw:
-            video_cap.vw.release()
-        if video_cap.vc:
-            video_cap.vc.release()
+            video_time = video_cap.vw.video_time
+        else:
+            video_time = float(event.frame / video_cap.analysis_fps) if video_cap.analysis_fps else 0
+        seq = event_journal.append(video_cap.video_id, video_cap.cam_name, event, video_time)
+        event_store.append(seq, video_cap.video_id, video_cap.cam_name, event, video_time)
+        if event_stream:
+            live_event = dict(zip(EventStore.COLUMNS, EventStore.row(seq, video_cap.video_id, video_cap.cam_name,
+                                                                     event, video_time)))
+            # Counts of every label of the source once the event is counted
+            live_event["counts"] = {label_names[i]: count for i, count in enumerate(video_cap.total_count) if count}
+            event_stream.publish(live_event)
+
+    snapshot_name = "output/intruder_{}".format(total_count)
+    snapshot_writer.submit(video_cap.cam_name, snapshot_name, frame)
+
+
+def collect_result(request_id):
+    """
+    Read the output of a completed infer request and give the request back to the pool.
+    The detections are scattered back to the frames of the batch by their image ID.
+    A frame is done when the detections of all its regions are collected.
+    The frames of a video source are processed in the order they were read, so a result
+    waits until the results of all the earlier frames of its source are collected.
+
+    :param request_id: Index of the completed infer request
+    :return: None
+    """
+    global infer_network
+    global in_flight
+
+    entries = in_flight.pop(request_id)
+    res = None
+    if infer_network.wait(request_id) == 0:
+        # Results of the output layer of the network
+        res = infer_network.get_output(request_id)
+    for slot, (video_cap, job, region_idx) in enumerate(entries):
+        if res is not None:
+            job.region_res[region_idx] = region_to_frame(res[:, :, res[0][0][:, 0] == slot], job.regions[region_idx],
+                                                         video_cap.input_width, video_cap.input_height)
+        job.regions_left -= 1
+        if job.regions_left == 0:
+            # A frame with a failed region is not processed
+            if all(region_res is not None for region_res in job.region_res):
+                job.inf_time = time.time() - job.start_time
+                job.res = numpy.concatenate(job.region_res, axis=2)
+                # Intruders seen by several tiles are counted once
+                if len(job.regions) > 1:
+                    job.res = merge_detections(job.res, TILE_MERGE_THRESHOLD, label_thresholds.min())
+            job.done = True
+    infer_network.release_request(request_id)
+
+    for video_cap, job, region_idx in entries:
+        flush_pending(video_cap)
+
+
+def flush_pending(video_cap):
+    """
+    Process the frames of a video source whose results are available, in the order
+    they were read. A skipped frame takes the result of the frame processed before it,
+    except with the tracker, which moves its tracks on the frames skipped between the
+    inferred frames. The frames skipped by the motion gate are unchanged, the tracker
+    gets the detections of the last inferred frame again, so its tracks don't age.
+
+    :param video_cap: VideoCap whose frames are processed
+    :return: None
+    """
+    while video_cap.pending and video_cap.pending[0].done:
+        job = video_cap.pending.popleft()
+        if job.skipped and (video_cap.tracker is None or job.static):
+            job.res = video_cap.last_res
+        # Frames whose inference failed are not processed
+        if job.res is not None or (job.skipped and video_cap.tracker is not None):
+            process_output(video_cap, job)
+            if video_cap.qos and video_cap.qos.update(time.time() - job.frame_time):
+                video_cap.apply_quality(video_cap.qos.level)
+                steps = video_cap.qos_steps[:video_cap.qos.level]
+                print("{}: quality level {}, {}, latency {:.0f} ms".format(
+                    video_cap.cam_name, video_cap.qos.level, ", ".join(steps) or "full quality",
+                    video_cap.qos.latency * 1000))
+        # The frame may be reused by the reader once processed
+        video_cap.reader.release()
+
+
+def init_source(video_cap):
+    """
+    Prepare the counting, recording and inference of the frames of an opened source
+
+    :param video_cap: VideoCap of the source
+    :return status: 0 on success, negative value on failure
+            value: On failure, the faulty value
+    """
+    video_cap.init(len(label_names))
+    video_cap.align_frame_rate(default_fps)
+    # Initializing VideoWriter for the source
+    if UI and not LOOP_VIDEO:
+        ret, ret_value = video_cap.init_vw(int(video_cap.input_height), int(video_cap.input_width))
+        if ret != 0:
+            return ret, ret_value
+    if CLIPS:
+        video_cap.init_clips(int(video_cap.input_height), int(video_cap.input_width))
+    n, c, h, w = infer_network.get_input_shape()
+    try:
+        video_cap.init_regions(w, h, infer_network.num_requests * BATCH_SIZE)
+    except ValueError:
+        return -19, video_cap.cam_name
+    if LATENCY_BUDGET:
+        video_cap.init_qos(LATENCY_BUDGET / 1000)
+    return 0, ''
+
+
+def diff_sources(running, sources, last_video_number):
+    """
+    Compare the sources of the configuration file with the running sources. A source whose
+    configuration entry changed is removed and added again. Added sources keep the name of
+    their position if it is free. They get a video ID never used during the run, so that
+    their recording and events don't mix with those of a previous source.
+
+    :param running: Configuration entry and name of every running source
+    :param sources: Sources of the configuration file, as returned by read_config
+    :param last_video_number: Highest video number used during the run
+    :return removed: Configuration entries of the removed sources
+            added: Added sources, with their name and video number, as taken by open_sources
+    """
+    entries = [source[5] for source in sources]
+    running_entries = [entry for entry, cam_name in running]
+    removed = [entry for entry in running_entries if entry not in entries]
+    names = [cam_name for entry, cam_name in running if entry not in removed]
+    added = []
+    for video, is_cam, cam_name, cams, video_options, entry in sources:
+        if entry in running_entries:
+            continue
+        idx = cams - 1
+        while cam_name in names:
+            idx += 1
+            cam_name = "Cam {}".format(idx)
+        names.append(cam_name)
+        last_video_number += 1
+        added.append((video, is_cam, cam_name, last_video_number, video_options, entry))
+    return removed, added
+
+
+def check_config():
+    """
+    Apply the changes of the configuration file if it was modified since the last check.
+    The labels are changed and the removed sources stopped straight away, the sources
+    still running keep their counts. The added sources are opened in the background,
+    so that the running sources are not held up.
+
+    :return: None
+    """
+    global config_mtime
+    global reload_future
+    global last_video_number
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime
+    except OSError:
+        return
+    # The sources of the previous change are still being opened
+    if mtime == config_mtime or reload_future:
+        return
+    config_mtime = mtime
+
+    start_time = time.time()
+    try:
+        ret, sources, req_labels, thresholds = read_config()
+    except (AssertionError, ValueError, KeyError, TypeError, AttributeError) as err:
+        print("Configuration file not reloaded, it is not valid: {}".format(err))
+        return
+    if ret == -38:
+        print("Configuration file not reloaded, invalid threshold {}".format(sources))
+        return
+    if ret != 0 or not sources:
+        print("Configuration file not reloaded, invalid or missing video source {}".format(sources or ''))
+        return
+    ret, value = apply_labels(req_labels, thresholds)
+    if ret != 0:
+        print("Configuration file not reloaded, invalid labels or thresholds {}".format(value))
+        return
+
+    running = [video_cap for video_cap in video_caps if not video_cap.removed]
+    removed_entries, new_sources = diff_sources([(video_cap.entry, video_cap.cam_name) for video_cap in running],
+                                                sources, last_video_number)
+    removed = [video_cap for video_cap in running if video_cap.entry in removed_entries]
+    if (removed or new_sources) and SHARDS:
+        print("Configuration file reloaded, but the sources can't be changed while decoding in worker processes")
+        return
+
+    for video_cap in removed:
+        # Released once its frames being inferred are processed
+        video_cap.removed = True
+        video_cap.ended = True
+        video_cap.reader.stop(wait=False)
+
+    last_video_number += len(new_sources)
+    if new_sources:
+        reload_executor = ThreadPoolExecutor(max_workers=1)
+        reload_future = reload_executor.submit(open_sources, new_sources)
+        reload_executor.shutdown(wait=False)
+
+    print("Configuration file reloaded in {:.1f} ms, {} sources removed, {} sources being added".format(
+        (time.time() - start_time) * 1000, len(removed), len(new_sources)))
+
+
+def add_sources():
+    """
+    Start processing the sources opened after a change of the configuration file
+
+    :return: None
+    """
+    global reload_future
+    new_caps = reload_future.result()
+    reload_future = None
+    for video_cap in new_caps:
+        if not video_cap.vc.isOpened():
+            print("Could not open {} for reading!".format(video_cap.cam_name))
+            continue
+        ret, value = init_source(video_cap)
+        if ret != 0:
+            print("Could not add {}: {}".format(video_cap.cam_name, value))
+            release_source(video_cap)
+            continue
+        video_cap.start_reader(LOOP_VIDEO)
+        video_caps.append(video_cap)
+        print("{} added, opened in {:.2f} s".format(video_cap.cam_name, video_cap.open_time))
 
 
 def intruder_detector():
@@ -395,16 +1439,32 @@ def intruder_detector():
 
     :return status: 0 on success, negative value on failure
     """
-    global CONF_CANDIDATE_CONFIDENCE
     global LOG_WIN_HEIGHT
-    global LOG_WIN_WIDTH
     global CONFIG_FILE
     global video_caps
     global conf_labels_file_path
     global is_async_mode
     global UI
     global LOOP_VIDEO
-
+    global infer_network
+    global in_flight
+    global label_names
+    global used_labels
+    global label_mask
+    global label_thresholds
+    global log_list
+    global log_file
+    global event_journal
+    global event_store
+    global event_stream
+    global live_server
+    global snapshot_writer
+    global batch
+    global config_mtime
+    global default_fps
+    global last_video_number
+
+    startup_time = time.time()
     parse_args()
     ret = check_args()
     if ret != 0:
@@ -419,20 +1479,29 @@ def intruder_detector():
     # Creates subdirectory to save output snapshots
     pathlib.Path(os.getcwd() + '/output/').mkdir(parents=True, exist_ok=True)
 
-    # Read the configuration file
+    # The model is loaded while the sources are opened
+    model_loader = ThreadPoolExecutor(max_workers=1)
+    model_future = model_loader.submit(load_model)
+    model_loader.shutdown(wait=False)
+
+    # Read the configuration file and open the sources
+    start_time = time.time()
+    config_mtime = os.stat(CONFIG_FILE).st_mtime
     ret, req_labels = get_input()
     if ret != 0:
         return ret, req_labels[0]
+    open_time = time.time() - start_time
 
     if not video_caps:
         return -14, ''
+    last_video_number = max(int(video_cap.video_id[len('video'):]) for video_cap in video_caps)
 
     # Get the labels that are used in the application
-    ret, label_names, used_labels = get_used_labels(req_labels)
+    ret, value = apply_labels(req_labels, conf_thresholds)
     if ret != 0:
-        return ret, ''
-    if True not in used_labels:
-        return -15, ''
+        return ret, value
+    # Every source is processed at its target frame rate, by default the one of the slowest source
+    default_fps = ANALYSIS_FPS or min([video_cap.fps for video_cap in video_caps])
 
     # Init a rolling log to store events
     rolling_log_size = int((LOG_WIN_HEIGHT - 15) / 20)
@@ -443,27 +1512,66 @@ def intruder_detector():
     if not log_file:
         return -16, ''
 
-    # Initializing VideoWriter for each source
-    if UI and not LOOP_VIDEO:
-        for video_cap in video_caps:
-            ret, ret_value = video_cap.init_vw(int(video_cap.input_height), int(video_cap.input_width))
-            if ret != 0:
-                return ret, ret_value
-
-    # Initialise the class
-    infer_network = Network()
-    # Load the network to IE plugin to get shape of input layer
-    n, c, h, w = infer_network.load_model(model_xml, TARGET_DEVICE, 1, 1, 2, CPU_EXTENSION)[1]
+    # Snapshots are encoded and written in the background
+    snapshot_writer = SnapshotWriter(SNAPSHOT_WORKERS, SNAPSHOT_QUEUE_SIZE, SNAPSHOT_FORMAT, SNAPSHOT_QUALITY)
+
+    # Open the event journal, it keeps the JSON files of the UI up to date while running
+    event_journal = EventJournal(EVENT_JOURNAL, EVENT_FILE, DATA_FILE, JOURNAL_FSYNC_INTERVAL, SNAPSHOT_INTERVAL,
+                                 UI_MAX_EVENTS, TimelineRollup(TIMELINE_FILE, TIMELINE_RESOLUTIONS,
+                                                                TIMELINE_MAX_BUCKETS))
+    try:
+        event_journal.open()
+    except OSError:
+        return -24, EVENT_JOURNAL
+
+    # The history of the events is kept in the event store rather than in memory
+    event_store = EventStore(EVENT_DB, JOURNAL_FSYNC_INTERVAL)
+    try:
+        event_store.open()
+    except sqlite3.Error as error:
+        return -33, "{}: {}".format(EVENT_DB, error)
+
+    # The live endpoint serves the events on its own threads
+    if STREAM_PORT:
+        event_stream = EventStream(event_store, STREAM_BUFFER, event_journal.seq)
+        try:
+            live_server = LiveServer(event_stream, STREAM_HOST, STREAM_PORT, STREAM_KEEP_ALIVE,
+                                     STREAM_ORIGIN or None)
+        except OSError as error:
+            return -37, "{}:{}: {}".format(STREAM_HOST, STREAM_PORT, error)
+        live_server.start()
+
+    if CLIPS:
+        pathlib.Path(OUTPUT_CLIP_PATH).mkdir(parents=True, exist_ok=True)
+
+    # Wait for the network to be loaded to the backend to get shape of input layer
+    try:
+        (n, c, h, w), load_time, warm_up_time = model_future.result()
+    except (ImportError, OSError, ValueError, BackendError) as err:
+        infer_network = None
+        return -29, str(err)
+    for video_cap in video_caps:
+        ret, ret_value = init_source(video_cap)
+        if ret != 0:
+            return ret, ret_value
+
+    slowest = max(video_caps, key=lambda video_cap: video_cap.open_time)
+    print("Startup times:")
+    print("  Opened {} sources in {:.2f} s, slowest {} in {:.2f} s".format(len(video_caps), open_time,
+                                                                          slowest.cam_name, slowest.open_time))
+    print("  Loaded the model in {:.2f} s, while opening the sources".format(load_time))
+    print("  Warmed up {} infer requests in {:.2f} s".format(infer_network.num_requests, warm_up_time))
+    print("  Ready in {:.2f} s".format(time.time() - startup_time))
     # Arrange windows so that they are not overlapping
-    arrange_windows()
+    if not HEADLESS:
+        arrange_windows()
 
-    min_fps = min([i.vc.get(cv2.CAP_PROP_FPS) for i in video_caps])
     signal.signal(signal.SIGINT, signal_handler, )
-    no_more_data = [False] * len(video_caps)
-    start_time = time.time()
-    inf_time = 0
-    next_request_id = 1
-    cur_request_id = 0
+
+    # Start decoding every source on its own thread
+    for video_cap in video_caps:
+        video_cap.start_reader(LOOP_VIDEO)
+    config_check_time = time.time()
     # Main loop starts here. Loop over all the video captures
 
     if is_async_mode:
@@ -472,20 +1580,18 @@ def intruder_detector():
         print("Application running in sync mode...")
 
     while True:
-        for idx, video_cap in enumerate(video_caps):
-            # Get a new frame
-            vfps = int(round(video_cap.vc.get(cv2.CAP_PROP_FPS)))
-            for i in range(0, int(round(vfps / min_fps))):
-                if is_async_mode:
-                    ret, video_cap.next_frame = video_cap.vc.read()
-                else:
-                    ret, video_cap.frame = video_cap.vc.read()
-                video_cap.loop_frames += 1
-                # If no new frame or error in reading a frame, exit the loop
-                if not ret:
-                    no_more_data[idx] = True
-                    break
-            if no_more_data[idx]:
+        frame_ready.clear()
+        took_frame = False
+        for video_cap in video_caps:
+            if video_cap.ended:
+                continue
+            # Get a new frame decoded by the reader thread of the source
+            ret, frame = video_cap.reader.read()
+            # If the source has ended, show it and move to the next source
+            if not ret:
+                video_cap.ended = True
+                if HEADLESS:
+                    continue
                 stream_end_frame = numpy.zeros((int(video_cap.input_height), int(video_cap.input_width), 1),
                                                dtype='uint8')
                 stream_end_message = "Stream from {} has ended.".format(video_cap.cam_name)
@@ -493,136 +1599,86 @@ def intruder_detector():
                             int(video_cap.input_height/2) - 30), cv2.FONT_HERSHEY_COMPLEX, 0.5, (255, 255, 255), 1)
                 cv2.imshow(video_cap.cam_name, stream_end_frame)
                 continue
-            for i in range(video_cap.no_of_labels):
-                video_cap.current_count[i] = 0
-                video_cap.changed_count[i] = False
-
-            # Resize to expected size (in model .xml file)
-            # Input frame is resized to infer resolution
-            if is_async_mode:
-                in_frame = cv2.resize(video_cap.next_frame, (w, h))
-                in_frame = in_frame.transpose((2, 0, 1))
-                in_frame = in_frame.reshape((n, c, h, w))
-
-                # Start asynchronous inference for specified request.
-                infer_network.exec_net(next_request_id, in_frame)
-                video_cap.frame = video_cap.next_frame
-                # Async enabled and only one video capture
-                if len(video_caps) == 1:
-                    videoCapResult = video_cap
-                # Async enabled and more than one video capture
-                else:
-                    # Get previous index
-                    videoCapResult = video_caps[idx - 1 if idx - 1 >= 0 else len(video_caps) - 1]
+            # No frame ready yet, the other sources are not kept waiting
+            if frame is None:
+                continue
+            video_cap.frame = frame
+            took_frame = True
+
+            job = InferJob(video_cap.frame, video_cap.infer_regions)
+            job.frame_time = video_cap.reader.frame_time
+            video_cap.pending.append(job)
+
+            # Skip inference between the inferred frames, or when nothing moved since the last one
+            video_cap.frames_since_inference += 1
+            if video_cap.frames_since_inference < INFER_INTERVAL:
+                job.skipped = True
+            elif video_cap.motion and not video_cap.motion.check(frame):
+                job.skipped = job.static = True
+            if job.skipped:
+                job.done = True
+                flush_pending(video_cap)
+                continue
 
+            # Add the frame to the batch, the batch is started as soon as it is full
+            video_cap.frames_since_inference = 0
+            add_to_batch(video_cap, job)
+
+            # In sync mode wait for the result before reading the next frame
+            if not is_async_mode:
+                if batch:
+                    submit_batch()
+                while in_flight:
+                    collect_result(infer_network.wait_completed())
+
+        # Don't keep the frames of an incomplete batch waiting past the deadline
+        submit_late_batch()
+
+        # No frame was ready, wait for a new frame or a finished request
+        if not took_frame:
+            if in_flight:
+                request_id = infer_network.wait_completed(timeout=0.01)
+                if request_id is not None:
+                    collect_result(request_id)
             else:
-                in_frame = cv2.resize(video_cap.frame, (w, h))
-                in_frame = in_frame.transpose((2, 0, 1))
-                in_frame = in_frame.reshape((n, c, h, w))
-
-                # Start synchronous inference for specified request.
-                infer_network.exec_net(cur_request_id, in_frame)
-                videoCapResult = video_cap
-
-            inf_start = time.time()
-            # Wait for the result
-            if infer_network.wait(cur_request_id) == 0:
-                inf_time = time.time() - inf_start
-                # Results of the output layer of the network
-                res = infer_network.get_output(cur_request_id)
-                for obj in res[0][0]:
-                    label = int(obj[1]) - 1
-                    # Draw the bounding box around the object when the probability is more than specified threshold
-                    if obj[2] > CONF_THRESHOLD_VALUE and used_labels[label]:                   
-                        videoCapResult.current_count[label] += 1
-                        xmin = int(obj[3] * videoCapResult.input_width)
-                        ymin = int(obj[4] * videoCapResult.input_height)
-                        xmax = int(obj[5] * videoCapResult.input_width)
-                        ymax = int(obj[6] * videoCapResult.input_height)
-                        # Draw bounding box around the intruder detected
-                        cv2.rectangle(videoCapResult.frame, (xmin, ymin), (xmax, ymax), (0, 255, 0), 4, 16)
-
-                for i in range(videoCapResult.no_of_labels):
-                    if videoCapResult.candidate_count[i] == videoCapResult.current_count[i]:
-                        videoCapResult.candidate_confidence[i] += 1
-                    else:
-                        videoCapResult.candidate_confidence[i] = 0
-                        videoCapResult.candidate_count[i] = videoCapResult.current_count[i]
-
-                    if videoCapResult.candidate_confidence[i] == CONF_CANDIDATE_CONFIDENCE:
-                        videoCapResult.candidate_confidence[i] = 0
-                        videoCapResult.changed_count[i] = True
-                    else:
-                        continue
-
-                    if videoCapResult.current_count[i] > videoCapResult.last_correct_count[i]:
-                        videoCapResult.total_count[i] += videoCapResult.current_count[i] - videoCapResult.last_correct_count[i]
-                        det_objs = videoCapResult.current_count[i] - videoCapResult.last_correct_count[i]
-                        total_count = sum(videoCapResult.total_count)
-                        for det_obj in range(det_objs):
-                            current_time = time.strftime("%H:%M:%S")
-                            log = "{} - Intruder {} detected on {}".format(current_time, label_names[i],
-                                                                           videoCapResult.cam_name)
-                            log_list.append(log)
-                            log_file.write(log + "\n")
-                            event = Event(event_time=current_time, intruder=label_names[i], count=total_count,
-                                          frame=videoCapResult.frame_count)
-                            videoCapResult.events.append(event)
-                            
-                        snapshot_name = "output/intruder_{}.png".format(total_count)
-                        cv2.imwrite(snapshot_name, videoCapResult.frame)
-                    videoCapResult.last_correct_count[i] = videoCapResult.current_count[i]
-
-                # Create intruder log window, add logs to the frame and display it
-                log_window = numpy.zeros((LOG_WIN_HEIGHT, LOG_WIN_WIDTH, 1), dtype='uint8')
-                for i, log in enumerate(log_list):
-                    cv2.putText(log_window, log, (10, 20 * i + 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                cv2.imshow("Intruder Log", log_window)
-                videoCapResult.frame_count += 1
-
-                # Video output
-                if UI and not LOOP_VIDEO:
-                    videoCapResult.vw.write(videoCapResult.frame)
-    
-                log_message = "Async mode is on." if is_async_mode else \
-                    "Async mode is off."
-                cv2.putText(videoCapResult.frame, log_message, (10, int(videoCapResult.input_height) - 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 10, 10), 1)
-                inf_time_message = "Inference time: N\A for async mode" if is_async_mode else \
-                    "Inference time: {:.3f} ms".format(inf_time * 1000)
-                cv2.putText(videoCapResult.frame, inf_time_message, (10, int(videoCapResult.input_height) - 30),
-                            cv2.FONT_HERSHEY_COMPLEX, 0.5, (200, 10, 10), 1)
-                fps_time = time.time() - start_time
-                fps_message = "FPS: {:.3f} fps".format(1/fps_time)
-                cv2.putText(videoCapResult.frame, fps_message, (10, int(videoCapResult.input_height) - 10),
-                            cv2.FONT_HERSHEY_COMPLEX, 0.5, (200, 10, 10), 1)
-
-                # Display the video output
-                cv2.imshow(videoCapResult.cam_name, videoCapResult.frame)
-
-            start_time = time.time()
-
-            # Loop video to mimic continuous input if LOOP_VIDEO flag is True
-            if LOOP_VIDEO and not videoCapResult.is_cam:
-                vfps = int(round(videoCapResult.vc.get(cv2.CAP_PROP_FPS)))
-                # If a video capture has ended restart it
-                if videoCapResult.loop_frames > videoCapResult.vc.get(cv2.CAP_PROP_FRAME_COUNT) - int(round(vfps / min_fps)):
-                    videoCapResult.loop_frames = 0
-                    videoCapResult.vc.set(cv2.CAP_PROP_POS_FRAMES, 0)
-
-            if is_async_mode:
-                # Swap infer request IDs
-                cur_request_id, next_request_id = next_request_id, cur_request_id
-
-        if cv2.waitKey(1) == 27:
+                frame_ready.wait(0.01)
+
+        # Collect the results of the requests which have already completed
+        request_id = infer_network.wait_completed(timeout=0)
+        while request_id is not None:
+            collect_result(request_id)
+            request_id = infer_network.wait_completed(timeout=0)
+
+        if not HEADLESS:
+            key = cv2.waitKey(1)
+            if key == 27:
+                break
+
+            if key == 9:
+                is_async_mode = not is_async_mode
+                print("Switched to {} mode".format("async" if is_async_mode else "sync"))
+
+        # Apply the changes of the configuration file
+        if RELOAD and time.time() - config_check_time >= CONFIG_CHECK_INTERVAL:
+            config_check_time = time.time()
+            check_config()
+        if reload_future and reload_future.done():
+            add_sources()
+        for video_cap in [video_cap for video_cap in video_caps if video_cap.removed and not video_cap.pending]:
+            # The decode thread may be stuck in a stalled source, it is waited for off the main loop
+            release_thread = threading.Thread(target=release_source, args=(video_cap,), daemon=True)
+            release_thread.start()
+            release_threads.append(release_thread)
+            video_caps.remove(video_cap)
+
+        if (all(video_cap.ended for video_cap in video_caps) and reload_future is None) or stop_requested:
             break
 
-        if cv2.waitKey(1) == 9:
-            is_async_mode = not is_async_mode
-            print("Switched to {} mode".format("async" if is_async_mode else "sync"))
-
-        if False not in no_more_data:
-            break
+    # Wait for the frames still being inferred
+    if batch:
+        submit_batch()
+    while in_flight:
+        collect_result(infer_network.wait_completed())
 
     ret = save_json()
     if ret != 0:
@@ -660,8 +1716,6 @@ if __name__ == '__main__':
         print("\nCould not open " + value + " for reading!")
     elif status == -10:
         print("Could not create event JSON file " + EVENT_FILE + "!")
-    elif status == -11:
-        print("Could not create data JSON file " + DATA_FILE + "!")
     elif status == -12:
         print(CONFIG_FILE + " configuration file not found!")
     elif status == -13:
@@ -674,6 +1728,50 @@ if __name__ == '__main__':
         print("Error in opening intruder log file!")
     elif status == -17:
         print("Could not find the device!")
+    elif status == -18:
+        print("Invalid number of infer requests!")
+    elif status == -19:
+        print("Invalid options for the video source " + value + "!")
+    elif status == -20:
+        print("Invalid batch options!")
+    elif status == -21:
+        print("Threshold given for " + value + " which is not in the label file!")
+    elif status == -22:
+        print("Invalid motion gate options!")
+    elif status == -23:
+        print("Invalid infer interval!")
+    elif status == -24:
+        print("Could not open the event journal " + value + "!")
+    elif status == -25:
+        print("Invalid snapshot format!")
+    elif status == -26:
+        print("Invalid recording options!")
+    elif status == -27:
+        print("Invalid number of shards!")
+    elif status == -28:
+        print("Invalid inference backend!")
+    elif status == -30:
+        print("Invalid analysis frame rate!")
+    elif status == -31:
+        print("Invalid tiles!")
+    elif status == -39:
+        print("Invalid input resolution!")
+    elif status == -32:
+        print("Invalid latency budget!")
+    elif status == -33:
+        print("Could not open the event store " + value + "!")
+    elif status == -35:
+        print("Invalid clip options!")
+    elif status == -38:
+        print("Invalid threshold " + value + ", thresholds are numbers between 0 and 1!")
+    elif status == -36:
+        print("Invalid stream port!")
+    elif status == -37:
+        print("Could not start the live endpoint on " + value + "!")
+    elif status == -34:
+        print("Could not write the last events to the event store " + EVENT_DB + "!")
+    elif status == -29:
+        print("Could not load the model with the " + BACKEND + " backend: " + value)
     else:
         print("Unknown error occurred!")
 
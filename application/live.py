@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import collections
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Longest wait of a long-poll request in seconds
+MAX_POLL_TIMEOUT = 60
+
+
+class EventStream:
+    """
+    Hands the intruder events over from the inference thread to the clients of the
+    live endpoint. The latest events are kept in a bounded buffer, and clients resuming
+    from an older sequence number are served from the event store.
+    """
+
+    def __init__(self, store, buffer_size, next_seq):
+        """
+        :param store: EventStore holding the events older than the buffer
+        :param buffer_size: Number of latest events kept in memory
+        :param next_seq: Sequence number of the next event
+        """
+        self.store = store
+        self.buffer_size = buffer_size
+        self.events = collections.deque(maxlen=buffer_size)
+        self.next_seq = next_seq
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def publish(self, event):
+        """
+        Adds an event and wakes up the waiting clients. Only takes a lock, the
+        events are serialized on the threads of the clients.
+        :param event: Dictionary of the event, with its sequence number in "seq"
+        :return: None
+        """
+        with self.cond:
+            self.events.append(event)
+            self.next_seq = event["seq"] + 1
+            self.cond.notify_all()
+
+    def wait(self, seq, timeout):
+        """
+        Gives the events from a sequence number on, waiting for a new event if there is none yet.
+        :param seq: Sequence number of the first event, None for the events published from now on
+        :param timeout: Maximum time to wait in seconds
+        :return: events: List of the events, empty on timeout or when the stream is closed
+                 seq: Sequence number of the event following the returned ones
+        """
+        with self.cond:
+            if seq is None:
+                seq = self.next_seq
+            self.cond.wait_for(lambda: self.closed or seq < self.next_seq, timeout)
+            if self.closed or seq >= self.next_seq:
+                return [], seq
+            if self.events and seq >= self.events[0]["seq"]:
+                return [event for event in self.events if event["seq"] >= seq], self.next_seq
+            oldest = self.events[0]["seq"] if self.events else self.next_seq
+        # Older events are read from the store, out of the lock
+        events = [event for event in self.store.since(seq, self.buffer_size) if event["seq"] < oldest]
+        if not events:
+            # Not stored yet, or lost, the client resumes with the buffer
+            return self.wait(oldest, 0)
+        return events, events[-1]["seq"] + 1
+
+    def close(self):
+        """
+        Wakes up the clients, their requests end.
+        :return: None
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class LiveRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the events as Server-Sent Events on /events, and as long-poll JSON on /poll.
+    Both take the sequence number of the first event wanted in the "since" parameter,
+    an event source also resumes after the Last-Event-ID it received.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            since = int(params["since"][0]) if "since" in params else None
+            if since is None and self.headers.get("Last-Event-ID"):
+                since = int(self.headers["Last-Event-ID"]) + 1
+            timeout = min(float(params.get("timeout", [MAX_POLL_TIMEOUT / 2])[0]), MAX_POLL_TIMEOUT)
+        except ValueError:
+            self.send_error(400)
+            return
+        if url.path == "/events":
+            self._stream(since)
+        elif url.path == "/poll":
+            self._poll(since, timeout)
+        else:
+            self.send_error(404)
+
+    def _poll(self, since, timeout):
+        events, next_seq = self.server.stream.wait(since, timeout)
+        body = json.dumps({"events": events, "next": next_seq}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self._allow_origin()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, since):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self._allow_origin()
+        self.end_headers()
+        stream = self.server.stream
+        try:
+            while not stream.closed:
+                events, since = stream.wait(since, self.server.keep_alive)
+                if not events:
+                    # Comment line keeping the connection open through proxies
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    self.wfile.write("id: {}\nevent: intruder\ndata: {}\n\n".format(
+                        event["seq"], json.dumps(event)).encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away
+            pass
+
+    def _allow_origin(self):
+        # Pages of other origins read the events only when their origin is allowed
+        if self.server.allow_origin:
+            self.send_header("Access-Control-Allow-Origin", self.server.allow_origin)
+
+    def log_message(self, format, *args):
+        # Requests are not logged to the console of the detector
+        pass
+
+
+class LiveServer:
+    """
+    Local HTTP endpoint pushing the intruder events as they are confirmed. It runs on
+    its own threads, one per client, never on the inference thread.
+    """
+
+    def __init__(self, stream, host, port, keep_alive, allow_origin=None):
+        """
+        :param stream: EventStream of the events
+        :param host: Address the endpoint listens on
+        :param port: Port the endpoint listens on
+        :param keep_alive: Seconds between two keep-alive messages of an idle event stream
+        :param allow_origin: Origin of the web pages allowed to read the events, None for the same origin only
+        """
+        self.stream = stream
+        self.server = ThreadingHTTPServer((host, port), LiveRequestHandler)
+        self.server.daemon_threads = True
+        self.server.stream = stream
+        self.server.keep_alive = keep_alive
+        self.server.allow_origin = allow_origin
+        self.thread = None
+
+    def start(self):
+        """
+        Starts serving on a background thread.
+        :return: None
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Ends the requests of the clients and stops serving.
+        :return: None
+        """
+        self.stream.close()
+        self.server.shutdown()
+        self.server.server_close()
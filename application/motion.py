@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import cv2
+
+# Width of the downscaled frames compared for motion
+MOTION_WIDTH = 160
+# Difference of gray level for a pixel to be considered changed
+PIXEL_THRESHOLD = 25
+
+
+class MotionDetector:
+    """
+    Cheap pre-filter deciding whether a frame changed enough since the last inferred
+    frame of its source to be worth an inference. Frames are downscaled, converted to
+    gray and blurred before being compared with the last inferred frame.
+    """
+
+    def __init__(self, sensitivity, refresh_interval):
+        """
+        :param sensitivity: Fraction of the pixels which must change to infer a frame
+        :param refresh_interval: Maximum number of frames skipped in a row, 0 for no limit
+        """
+        self.sensitivity = sensitivity
+        self.refresh_interval = refresh_interval
+        self.reference = None
+        self.small = None
+        self.skipped = 0
+
+    def _prepare(self, frame):
+        """
+        Downscales the frame to gray, into the buffer reused for every frame.
+        :param frame: Decoded frame
+        :return: Downscaled, blurred gray frame
+        """
+        height = max(int(frame.shape[0] * MOTION_WIDTH / frame.shape[1]), 1)
+        self.small = cv2.resize(frame, (MOTION_WIDTH, height), dst=self.small, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, frame):
+        """
+        Tells whether the frame has to be inferred.
+        :param frame: Decoded frame
+        :return: True when the frame changed or the refresh interval is over, False otherwise
+        """
+        gray = self._prepare(frame)
+        if self.reference is not None and self.reference.shape == gray.shape:
+            if not self.refresh_interval or self.skipped < self.refresh_interval:
+                diff = cv2.absdiff(gray, self.reference)
+                changed = cv2.countNonZero(cv2.threshold(diff, PIXEL_THRESHOLD, 255, cv2.THRESH_BINARY)[1])
+                if changed < self.sensitivity * gray.size:
+                    self.skipped += 1
+                    return False
+
+        self.reference = gray
+        self.skipped = 0
+        return True
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+
+# Seconds between two changes of the quality level, so that the latency settles
+QOS_HOLD = 2
+# Fraction of the latency budget under which the quality is raised again
+QOS_RESTORE = 0.5
+# Weight of the latest frame in the smoothed latency
+QOS_SMOOTHING = 0.1
+
+
+class QosController:
+    """
+    Keeps the latency of a video source within a budget by degrading its quality
+    level by level. The smoothed latency of the processed frames is compared to the
+    budget: over the budget the quality is lowered, under a fraction of the budget it
+    is raised again. The level changes at most once per hold time, so that the effect
+    of a change shows in the latency before the next one.
+    """
+
+    def __init__(self, budget, num_levels, hold=QOS_HOLD, restore=QOS_RESTORE, smoothing=QOS_SMOOTHING):
+        """
+        :param budget: Latency budget in seconds
+        :param num_levels: Number of quality levels, level 0 being the full quality
+        :param hold: Minimum time in seconds between two level changes
+        :param restore: Fraction of the budget under which the quality is raised
+        :param smoothing: Weight of the latest latency in the smoothed latency
+        """
+        self.budget = budget
+        self.num_levels = num_levels
+        self.hold = hold
+        self.restore = restore
+        self.smoothing = smoothing
+        self.level = 0
+        self.latency = 0
+        self.last_change = time.time()
+
+    def update(self, latency, now=None):
+        """
+        Adds the latency of a processed frame and changes the quality level if needed.
+        :param latency: Time in seconds from the decoding of the frame to the end of its processing
+        :param now: Current time, time.time() by default
+        :return: True if the quality level changed
+        """
+        now = time.time() if now is None else now
+        self.latency += self.smoothing * (latency - self.latency)
+        if now - self.last_change < self.hold:
+            return False
+        if self.latency > self.budget and self.level < self.num_levels - 1:
+            self.level += 1
+        elif self.latency < self.budget * self.restore and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+        self.last_change = now
+        return True
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import collections
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import logging as log
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy
+from frame_reader import POLICY_BLOCK, POLICY_DROP, POLICY_LATEST, keep_frame, open_capture
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python older than 3.8
+    shared_memory = None
+
+# Slot index telling the main process that a source has ended
+END_OF_STREAM = -1
+# Seconds between two checks of the stop request by the blocked decode threads
+POLL_INTERVAL = 0.1
+
+
+class SharedVideoCapture:
+    """
+    Stands for a cv2.VideoCapture opened in a decode worker process. It answers the
+    properties read by the main process.
+    """
+
+    def __init__(self, cam_idx):
+        self.cam_idx = cam_idx
+        self.opened = False
+        self.props = {}
+        self.open_time = 0
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def release(self):
+        pass
+
+
+class SharedFrameReader:
+    """
+    Main process side of the shared memory ring of a source, with the interface of
+    FrameReader. read() returns a view on a slot of the ring, and release() gives the
+    oldest slot handed out back to the worker once its frame has been processed.
+    With the "latest" policy, read() returns the newest frame and gives the slots of
+    the older ones back straight away.
+    """
+
+    def __init__(self, shm, shape, slots, ready_queue, free_queue, dropped_frames, frame_ratio, policy):
+        self.shm = shm
+        self.frames = numpy.ndarray((slots,) + shape, dtype=numpy.uint8, buffer=shm.buf)
+        self.ready_queue = ready_queue
+        self.free_queue = free_queue
+        self.dropped = dropped_frames
+        self.shared_frame_ratio = frame_ratio
+        self.policy = policy
+        self.stale_frames = 0
+        self.in_use = collections.deque()
+        self.ended = False
+        self.frame_time = 0
+
+    @property
+    def dropped_frames(self):
+        return self.dropped.value + self.stale_frames
+
+    @property
+    def frame_ratio(self):
+        return self.shared_frame_ratio.value
+
+    @frame_ratio.setter
+    def frame_ratio(self, frame_ratio):
+        self.shared_frame_ratio.value = frame_ratio
+
+    def read(self):
+        """
+        Takes the oldest frame decoded by the worker without blocking, or the newest
+        one with the "latest" policy.
+        :return: ret: False when the source has ended and all its frames were taken
+                 frame: View on the slot holding the frame, None if no frame is ready yet
+        """
+        if self.ended:
+            return False, None
+        try:
+            slot, self.frame_time = self.ready_queue.get_nowait()
+        except queue.Empty:
+            return True, None
+        while self.policy == POLICY_LATEST and slot != END_OF_STREAM:
+            try:
+                newer_slot, frame_time = self.ready_queue.get_nowait()
+            except queue.Empty:
+                break
+            if newer_slot == END_OF_STREAM:
+                # A live source ends on its newest frame
+                self.ended = True
+                break
+            self.free_queue.put(slot)
+            self.stale_frames += 1
+            slot, self.frame_time = newer_slot, frame_time
+        if slot == END_OF_STREAM:
+            self.ended = True
+            return False, None
+        self.in_use.append(slot)
+        return True, self.frames[slot]
+
+    def release(self):
+        """
+        Gives the slot of the oldest frame handed out back to the worker.
+        :return: None
+        """
+        if self.in_use:
+            self.free_queue.put(self.in_use.popleft())
+
+    def stop(self, wait=True):
+        """
+        The worker process stops decoding when the pool is stopped.
+        :param wait: Unused, there is no thread to wait for in the main process
+        :return: None
+        """
+        self.frames = None
+
+
+class ShardPool:
+    """
+    Decodes the video sources in worker processes. The sources are assigned to the
+    workers in turn, and the decoded frames are passed to the main process through a
+    ring of frame slots in shared memory. Only the slot indices go through queues.
+    """
+
+    def __init__(self, num_shards):
+        self.num_shards = num_shards
+        self.commands = []
+        # Workers are spawned, forking a process which runs inference threads is unsafe
+        self.context = multiprocessing.get_context("spawn")
+        self.info_queue = self.context.Queue()
+        self.ready_queues = []
+        self.free_queues = []
+        self.dropped_frames = []
+        self.frame_ratios = []
+        self.shms = []
+        self.processes = []
+
+    def open(self, sources):
+        """
+        Starts the workers, which open their sources, and waits for the properties of all the sources.
+        :param sources: List of the video path or camera ID, and camera flag, of every source
+        :return: List of SharedVideoCapture, in the order of the sources
+        """
+        for cam_idx in range(len(sources)):
+            self.ready_queues.append(self.context.Queue())
+            self.free_queues.append(self.context.Queue())
+            self.dropped_frames.append(self.context.Value('i', 0))
+            self.frame_ratios.append(self.context.Value('d', 1.0))
+
+        for shard in range(min(self.num_shards, len(sources))):
+            cam_indices = list(range(shard, len(sources), self.num_shards))
+            commands = self.context.Queue()
+            process = self.context.Process(target=shard_worker, daemon=True, args=(
+                [(cam_idx, sources[cam_idx]) for cam_idx in cam_indices], commands, self.info_queue,
+                [self.ready_queues[cam_idx] for cam_idx in cam_indices],
+                [self.free_queues[cam_idx] for cam_idx in cam_indices],
+                [self.dropped_frames[cam_idx] for cam_idx in cam_indices],
+                [self.frame_ratios[cam_idx] for cam_idx in cam_indices]))
+            process.start()
+            self.commands.append(commands)
+            self.processes.append(process)
+
+        captures = [SharedVideoCapture(cam_idx) for cam_idx in range(len(sources))]
+        for i in range(len(sources)):
+            cam_idx, opened, props, open_time = self.info_queue.get()
+            captures[cam_idx].opened = opened
+            captures[cam_idx].props = props
+            captures[cam_idx].open_time = open_time
+        return captures
+
+    def start_reader(self, capture, frame_ratio, loop, slots, policy):
+        """
+        Allocates the shared memory ring of a source and starts decoding it in its worker.
+        :param capture: SharedVideoCapture of the source
+        :param frame_ratio: Fraction of the frames of the source passed on, may be changed through the reader
+        :param loop: Restart the source when it ends
+        :param slots: Number of frames in the ring
+        :param policy: What to do when all the slots are in use, "drop", "block" or "latest"
+        :return: SharedFrameReader of the source
+        """
+        cam_idx = capture.cam_idx
+        shape = (int(capture.get(4)), int(capture.get(3)), 3)
+        shm = shared_memory.SharedMemory(create=True, size=slots * int(numpy.prod(shape)))
+        self.shms.append(shm)
+        for slot in range(slots):
+            self.free_queues[cam_idx].put(slot)
+        self.frame_ratios[cam_idx].value = frame_ratio
+        self.commands[cam_idx % self.num_shards].put(("start", cam_idx, shm.name, shape, slots, loop, policy))
+        return SharedFrameReader(shm, shape, slots, self.ready_queues[cam_idx], self.free_queues[cam_idx],
+                                 self.dropped_frames[cam_idx], self.frame_ratios[cam_idx], policy)
+
+    def stop(self):
+        """
+        Stops the workers and frees the shared memory.
+        :return: None
+        """
+        for commands in self.commands:
+            commands.put(("stop",))
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.commands = []
+        self.processes = []
+        for shm in self.shms:
+            try:
+                shm.close()
+            except BufferError:
+                # Frames of the ring are still referenced, the mapping goes away with them
+                pass
+            shm.unlink()
+        self.shms = []
+
+
+def decode_source(vc, shm_name, shape, slots, loop, policy, ready_queue, free_queue, dropped_frames, frame_ratio,
+                  stop_event):
+    """
+    Decodes a source straight into the free slots of its shared memory ring, on a
+    thread of the worker process. When no slot is free, a camera drops its frame
+    and a video file waits for the main process to release a slot. With the "latest"
+    policy, the slot of the oldest frame not taken yet is reused. Frames skipped
+    by the frame rate alignment are grabbed but never decoded.
+    """
+    # The spawned workers share the resource tracker of the main process, which unlinks the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = numpy.ndarray((slots,) + shape, dtype=numpy.uint8, buffer=shm.buf)
+    if policy == POLICY_LATEST:
+        # Don't let frames age in the buffer of the capture either
+        vc.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    try:
+        rewound = False
+        idx = 0
+        while not stop_event.is_set():
+            ret = vc.grab()
+            if not ret:
+                if loop and not rewound:
+                    # Restart the source once, give up if it still has no frame
+                    vc.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                    continue
+                break
+            rewound = False
+            idx += 1
+            if not keep_frame(idx - 1, frame_ratio.value):
+                continue
+
+            slot = None
+            while slot is None and not stop_event.is_set():
+                try:
+                    if policy in (POLICY_DROP, POLICY_LATEST):
+                        slot = free_queue.get_nowait()
+                    else:
+                        slot = free_queue.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if policy == POLICY_LATEST:
+                        # The oldest frame not taken by the main process is stale
+                        try:
+                            slot = ready_queue.get_nowait()[0]
+                            with dropped_frames.get_lock():
+                                dropped_frames.value += 1
+                        except queue.Empty:
+                            break
+                    elif policy == POLICY_DROP:
+                        break
+            if slot is None:
+                if policy != POLICY_BLOCK:
+                    with dropped_frames.get_lock():
+                        dropped_frames.value += 1
+                continue
+
+            ret, frame = vc.retrieve(frames[slot])
+            if ret and not numpy.shares_memory(frame, frames[slot]):
+                # The frame could not be decoded in place
+                if frame.shape != frames[slot].shape:
+                    raise ValueError("The size of the frames changed from {} to {}".format(
+                        frames[slot].shape, frame.shape))
+                frames[slot] = frame
+            if ret:
+                ready_queue.put((slot, time.time()))
+            else:
+                free_queue.put(slot)
+    except Exception as err:
+        # The source ends, the main process is told below like at the end of the source
+        log.error("Stopped decoding a video source: {}".format(err))
+    finally:
+        ready_queue.put((END_OF_STREAM, 0))
+        del frames
+        shm.close()
+
+
+def shard_worker(sources, commands, info_queue, ready_queues, free_queues, dropped_frames, frame_ratios):
+    """
+    Entry point of a decode worker process. Opens its sources and reports their
+    properties, then decodes every started source on its own thread until stopped.
+    """
+    # Ctrl+C is handled by the main process, which stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    captures = {}
+    queues = {}
+
+    def open_source(source):
+        cam_idx, (video, is_cam) = source
+        start_time = time.time()
+        vc = open_capture(video, is_cam)
+        props = {prop: vc.get(prop) for prop in [3, 4, cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT]}
+        info_queue.put((cam_idx, vc.isOpened(), props, time.time() - start_time))
+        return vc
+
+    # The sources of the worker are opened concurrently
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        opened = list(executor.map(open_source, sources))
+    for (cam_idx, source), vc, ready_queue, free_queue, dropped, frame_ratio in zip(
+            sources, opened, ready_queues, free_queues, dropped_frames, frame_ratios):
+        captures[cam_idx] = vc
+        queues[cam_idx] = (ready_queue, free_queue, dropped, frame_ratio)
+
+    stop_event = threading.Event()
+    threads = []
+    while True:
+        command = commands.get()
+        if command[0] == "stop":
+            break
+        cam_idx, shm_name, shape, slots, loop, policy = command[1:]
+        thread = threading.Thread(target=decode_source, daemon=True, args=(
+            captures[cam_idx], shm_name, shape, slots, loop, policy) + queues[cam_idx] + (stop_event,))
+        thread.start()
+        threads.append(thread)
+
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    for vc in captures.values():
+        vc.release()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import numpy
+from detection import iou_matrix
+
+
+class Track:
+    """
+    An object followed across the frames of a video source.
+    """
+
+    def __init__(self, track_id, label, box):
+        self.track_id = track_id
+        self.label = label
+        self.box = numpy.asarray(box, dtype=numpy.float32)
+        self.detected_box = self.box.copy()
+        # Motion of the box per frame, estimated from the last two detections
+        self.velocity = numpy.zeros(4, dtype=numpy.float32)
+        self.hits = 1
+        self.frames_since_update = 0
+        self.confirmed = False
+
+
+class IouTracker:
+    """
+    Follows the detected objects of a video source by matching the boxes of every
+    detector run with the tracks of the same label that overlap them the most.
+    Between detector runs, the boxes of the tracks are moved at their last velocity.
+    """
+
+    def __init__(self, min_hits, max_age, iou_threshold=0.3):
+        """
+        :param min_hits: Number of detector runs matching a track before it is confirmed
+        :param max_age: Number of frames a track is kept without being matched
+        :param iou_threshold: Minimum IoU of a detection with the box of a track to match it
+        """
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.iou_threshold = iou_threshold
+        self.tracks = []
+        self.next_id = 1
+
+    def predict(self):
+        """
+        Moves the tracks to where they are expected on a frame without detections.
+        :return: None
+        """
+        for track in self.tracks:
+            track.box += track.velocity
+            track.frames_since_update += 1
+        self.tracks = [track for track in self.tracks if track.frames_since_update <= self.max_age]
+
+    def update(self, labels, boxes):
+        """
+        Matches the detections of a frame with the tracks and starts new tracks for
+        the detections which are not matched.
+        :param labels: Label index of every detection
+        :param boxes: Array of xmin, ymin, xmax, ymax of every detection
+        :return: Tracks confirmed on this frame
+        """
+        for track in self.tracks:
+            track.box += track.velocity
+            track.frames_since_update += 1
+
+        matched = numpy.zeros(len(labels), dtype=bool)
+        if self.tracks and len(labels):
+            track_boxes = numpy.array([track.box for track in self.tracks])
+            track_labels = numpy.array([track.label for track in self.tracks])
+            iou = iou_matrix(track_boxes, boxes)
+            iou[track_labels[:, None] != numpy.asarray(labels)[None, :]] = 0
+            # Greedily match the pairs overlapping the most
+            while True:
+                t, d = numpy.unravel_index(numpy.argmax(iou), iou.shape)
+                if iou[t, d] < self.iou_threshold:
+                    break
+                track = self.tracks[t]
+                box = numpy.asarray(boxes[d], dtype=numpy.float32)
+                track.velocity = (box - track.detected_box) / track.frames_since_update
+                track.box = box
+                track.detected_box = box.copy()
+                track.hits += 1
+                track.frames_since_update = 0
+                matched[d] = True
+                iou[t, :] = 0
+                iou[:, d] = 0
+
+        self.tracks = [track for track in self.tracks if track.frames_since_update <= self.max_age]
+        for label, box in zip(numpy.asarray(labels)[~matched], numpy.asarray(boxes)[~matched]):
+            self.tracks.append(Track(self.next_id, int(label), box))
+            self.next_id += 1
+
+        confirmed = []
+        for track in self.tracks:
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                confirmed.append(track)
+        return confirmed
+
+    def active_tracks(self):
+        """
+        Gives the confirmed tracks, matched recently enough to be still in the frame.
+        :return: List of Track
+        """
+        return [track for track in self.tracks if track.confirmed]
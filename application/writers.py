@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import collections
+import os
+import threading
+import cv2
+from frame_reader import keep_frame
+
+# Image formats of the snapshots, with the encoding parameter set by the quality
+SNAPSHOT_FORMATS = {
+    "png": cv2.IMWRITE_PNG_COMPRESSION,
+    "jpg": cv2.IMWRITE_JPEG_QUALITY,
+    "webp": cv2.IMWRITE_WEBP_QUALITY,
+}
+
+
+class SnapshotWriter:
+    """
+    Encodes and writes the snapshots of the intruders on a pool of worker threads,
+    so that the inference loop only pays for a copy of the frame. When the queue is
+    full, a new snapshot of a source replaces the queued snapshot of the same source,
+    otherwise the oldest queued snapshot is dropped.
+    """
+
+    def __init__(self, num_workers, queue_size, image_format, quality=None):
+        """
+        :param num_workers: Number of threads encoding the snapshots
+        :param queue_size: Maximum number of snapshots waiting for a worker
+        :param image_format: Image format, "png", "jpg" or "webp"
+        :param quality: Compression level for png (0-9), quality for jpg and webp (0-100), None for the defaults
+        """
+        self.queue_size = queue_size
+        self.extension = image_format
+        self.params = [] if quality is None else [SNAPSHOT_FORMATS[image_format], quality]
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.merged_snapshots = 0
+        self.dropped_snapshots = 0
+        self.failed_snapshots = 0
+        self.workers = [threading.Thread(target=self._run, daemon=True) for i in range(num_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, source, name, frame):
+        """
+        Queues a copy of a frame to be written as a snapshot.
+        :param source: Name of the video source the frame comes from
+        :param name: Path of the snapshot, without extension
+        :param frame: Frame to write
+        :return: None
+        """
+        path = "{}.{}".format(name, self.extension)
+        with self.cond:
+            if len(self.queue) >= self.queue_size:
+                for idx, (queued_source, queued_path, queued_frame) in enumerate(self.queue):
+                    if queued_source == source:
+                        self.queue[idx] = (source, path, frame.copy())
+                        self.merged_snapshots += 1
+                        return
+                self.queue.popleft()
+                self.dropped_snapshots += 1
+            self.queue.append((source, path, frame.copy()))
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.stopped:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+                source, path, frame = self.queue.popleft()
+            if not cv2.imwrite(path, frame, self.params):
+                self.failed_snapshots += 1
+
+    def close(self):
+        """
+        Writes the queued snapshots and stops the workers.
+        :return: None
+        """
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        for worker in self.workers:
+            worker.join()
+
+
+class VideoRecorder:
+    """
+    Encodes the processed frames of a video source on its own thread. It has the
+    write() and release() methods of cv2.VideoWriter, write() only queues a copy of
+    the frame. Frames arriving while the queue is full are dropped and counted, they
+    are missing from the video.
+    """
+
+    def __init__(self, path, codec, fps, size, queue_size, scale=1, max_fps=0):
+        """
+        :param path: Path of the video file
+        :param codec: FourCC code of the codec
+        :param fps: Frame rate of the frames written
+        :param size: Width and height of the frames written
+        :param queue_size: Maximum number of frames waiting to be encoded
+        :param scale: Scale factor of the recorded frames, 1 to keep their size
+        :param max_fps: Maximum frame rate of the recording, 0 to keep every frame
+        """
+        self.fps = fps
+        self.out_fps = min(max_fps, fps) if max_fps > 0 and fps > 0 else fps
+        self.size = (max(int(size[0] * scale), 1), max(int(size[1] * scale), 1))
+        self.scale = scale
+        self.queue_size = queue_size
+        self.vw = cv2.VideoWriter(path, codec, self.out_fps, self.size, True)
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.frame_count = 0
+        self.dropped_frames = 0
+        # Frames queued to be encoded, the frames of the video file
+        self.recorded_frames = 0
+        self.thread = None
+        if self.vw.isOpened():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def isOpened(self):
+        return self.vw.isOpened()
+
+    def write(self, frame):
+        """
+        Queues a copy of a frame to be encoded, unless the frame rate of the recording skips it.
+        :param frame: Frame to record
+        :return: None
+        """
+        idx = self.frame_count
+        self.frame_count += 1
+        if not keep_frame(idx, self.out_fps / self.fps if self.fps else 1):
+            return
+        with self.cond:
+            if len(self.queue) >= self.queue_size:
+                self.dropped_frames += 1
+                return
+            self.queue.append(frame.copy())
+            self.recorded_frames += 1
+            self.cond.notify()
+
+    @property
+    def video_time(self):
+        """
+        Position in the video file of the next frame written, in seconds.
+        """
+        return float(self.recorded_frames / self.out_fps) if self.out_fps else 0
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.stopped:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+                frame = self.queue.popleft()
+            if self.scale != 1:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            self.vw.write(frame)
+
+    def release(self):
+        """
+        Encodes the queued frames and closes the video file.
+        :return: None
+        """
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if self.thread:
+            self.thread.join()
+        self.vw.release()
+
+
+class ClipRecorder:
+    """
+    Records short clips around the intruder events of a video source instead of the
+    whole video. The latest processed frames are kept in a bounded ring, and an event
+    starts a clip with the frames of the ring, the pre-roll, followed by the frames of
+    the post-roll. An event during the post-roll extends the clip. The clips are
+    encoded on their own thread, so encoding only costs CPU and disk while there is
+    activity.
+    """
+
+    def __init__(self, directory, prefix, codec, fps, size, pre_roll, post_roll, queue_size, scale=1, max_fps=0):
+        """
+        :param directory: Directory of the clips
+        :param prefix: Start of the file names of the clips
+        :param codec: FourCC code of the codec
+        :param fps: Frame rate of the frames written
+        :param size: Width and height of the frames written
+        :param pre_roll: Seconds recorded before an event
+        :param post_roll: Seconds recorded after an event
+        :param queue_size: Maximum number of frames waiting to be encoded, on top of the pre-roll
+        :param scale: Scale factor of the recorded frames, 1 to keep their size
+        :param max_fps: Maximum frame rate of the clips, 0 to keep every frame
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.codec = codec
+        self.fps = fps
+        self.out_fps = min(max_fps, fps) if max_fps > 0 and fps > 0 else fps
+        self.size = (max(int(size[0] * scale), 1), max(int(size[1] * scale), 1))
+        self.scale = scale
+        self.post_roll_frames = max(int(round(post_roll * self.out_fps)), 1)
+        # Frames of the pre-roll, already scaled
+        self.ring = collections.deque(maxlen=max(int(round(pre_roll * self.out_fps)), 1))
+        self.queue_size = queue_size + self.ring.maxlen
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.clip = None
+        self.remaining_frames = 0
+        self.clip_frames = 0
+        self.frame_count = 0
+        self.clip_count = 0
+        self.dropped_frames = 0
+        self.failed_clips = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, frame):
+        """
+        Keeps a copy of a processed frame in the pre-roll ring, or queues it to be encoded
+        while a clip is recorded, unless the frame rate of the clips skips it.
+        :param frame: Frame to record
+        :return: None
+        """
+        idx = self.frame_count
+        self.frame_count += 1
+        if not keep_frame(idx, self.out_fps / self.fps if self.fps else 1):
+            return
+        if self.scale != 1:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()
+        if self.clip is None:
+            self.ring.append(frame)
+            return
+        self._queue(frame)
+        self.remaining_frames -= 1
+        if self.remaining_frames == 0:
+            # The post-roll is over, the next frames go to the ring again
+            self._queue(None)
+            self.clip = None
+
+    def trigger(self, name):
+        """
+        Starts a clip with the frames of the pre-roll, or extends the clip being recorded.
+        :param name: Name of the clip, without extension, used when a new clip starts
+        :return: clip: File name of the clip the event is in
+                 clip_time: Time of the event in the clip, in seconds
+        """
+        if self.clip is None:
+            self.clip = "{}_{}.mp4".format(self.prefix, name)
+            self.clip_count += 1
+            self.clip_frames = 0
+            while self.ring:
+                self._queue(self.ring.popleft())
+        self.remaining_frames = self.post_roll_frames
+        clip_time = float(self.clip_frames / self.out_fps) if self.out_fps else 0
+        return self.clip, clip_time
+
+    def _queue(self, frame):
+        """
+        Queues a frame of the current clip, None to close the clip.
+        :param frame: Frame to encode
+        :return: None
+        """
+        with self.cond:
+            if frame is not None:
+                if len(self.queue) >= self.queue_size:
+                    self.dropped_frames += 1
+                    return
+                # The dropped frames are not in the clip, they don't move the events
+                self.clip_frames += 1
+            self.queue.append((self.clip, frame))
+            self.cond.notify()
+
+    def _run(self):
+        vw = None
+        while True:
+            with self.cond:
+                while not self.queue and not self.stopped:
+                    self.cond.wait()
+                if not self.queue:
+                    break
+                clip, frame = self.queue.popleft()
+            if frame is None:
+                if vw is not None:
+                    vw.release()
+                vw = None
+                continue
+            if vw is None:
+                vw = cv2.VideoWriter(os.path.join(self.directory, clip), self.codec, self.out_fps, self.size, True)
+                if not vw.isOpened():
+                    self.failed_clips += 1
+            vw.write(frame)
+        if vw is not None:
+            vw.release()
+
+    def release(self):
+        """
+        Ends the clip being recorded, encodes the queued frames and stops the thread.
+        :return: None
+        """
+        if self.clip is not None:
+            self._queue(None)
+            self.clip = None
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        self.thread.join()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import math
+import cv2
+import numpy
+
+# Margin added around a zone before cropping, as a fraction of its size, so that the
+# intruders standing in the zone are not cut
+ZONE_MARGIN = 0.2
+# Fraction of a tile shared with its neighbours, an intruder cut by the edge of a tile
+# is seen whole by the next one
+TILE_OVERLAP = 0.2
+# Automatic tiling
+TILES_AUTO = "auto"
+
+
+def parse_zone(zone):
+    """
+    Reads a zone of the configuration file, either a rectangle [x, y, width, height]
+    or a polygon [[x1, y1], [x2, y2], ...], in pixels of the frames of the source.
+
+    :param zone: Zone as given in the configuration file
+    :return: Polygon of the zone, array of int32 of shape [N, 2]
+    """
+    if len(zone) == 4 and all(isinstance(value, (int, float)) for value in zone):
+        x, y, w, h = zone
+        zone = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+    polygon = numpy.array(zone, dtype=numpy.int32)
+    if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+        raise ValueError("A zone is a rectangle or a polygon of at least 3 points")
+    return polygon
+
+
+def zone_mask(zones, width, height):
+    """
+    Draws the zones into a mask of the frame, to look up whether a point is in a zone.
+
+    :param zones: Polygons of the zones
+    :param width: Width of the frames
+    :param height: Height of the frames
+    :return: Array of uint8 of shape [height, width], non-zero inside the zones
+    """
+    mask = numpy.zeros((height, width), dtype=numpy.uint8)
+    cv2.fillPoly(mask, zones, 255)
+    return mask
+
+
+def parse_tiles(tiles):
+    """
+    Reads a tiling option, "auto" or the number of columns and rows of tiles, as
+    "<columns>x<rows>" or [columns, rows].
+
+    :param tiles: Tiling option, empty or None for no tiling
+    :return: None, "auto" or (columns, rows)
+    """
+    if not tiles:
+        return None
+    if tiles == TILES_AUTO:
+        return TILES_AUTO
+    if isinstance(tiles, str):
+        tiles = tiles.lower().split('x')
+    cols, rows = [int(value) for value in tiles]
+    if cols < 1 or rows < 1:
+        raise ValueError("A tiling has at least one column and one row")
+    return cols, rows
+
+
+def auto_tiles(width, height, input_width, input_height, max_tiles):
+    """
+    Picks the grid of tiles of the automatic tiling: as many tiles as can be inferred at
+    once, but no tile smaller than the network input, where tiling would gain nothing.
+    Among the grids with the most tiles, the one whose tiles are shaped most like the
+    network input is picked.
+
+    :param width: Width of the tiled region
+    :param height: Height of the tiled region
+    :param input_width: Width of the network input
+    :param input_height: Height of the network input
+    :param max_tiles: Number of frames the infer requests take at once
+    :return: (columns, rows)
+    """
+    best, best_key = (1, 1), None
+    for cols in range(1, max_tiles + 1):
+        for rows in range(1, max_tiles // cols + 1):
+            tile_width = width / (cols - (cols - 1) * TILE_OVERLAP)
+            tile_height = height / (rows - (rows - 1) * TILE_OVERLAP)
+            if tile_width < input_width or tile_height < input_height:
+                continue
+            key = (cols * rows, -abs(numpy.log(tile_width * input_height / (tile_height * input_width))))
+            if best_key is None or key > best_key:
+                best, best_key = (cols, rows), key
+    return best
+
+
+def tile_regions(regions, cols, rows):
+    """
+    Splits regions of a frame into grids of overlapping tiles.
+
+    :param regions: List of x, y, width, height of the regions
+    :param cols: Number of columns of tiles of every region
+    :param rows: Number of rows of tiles of every region
+    :return: List of x, y, width, height of the tiles
+    """
+    tiles = []
+    for x, y, w, h in regions:
+        tile_width = w / (cols - (cols - 1) * TILE_OVERLAP)
+        tile_height = h / (rows - (rows - 1) * TILE_OVERLAP)
+        for row in range(rows):
+            for col in range(cols):
+                x1 = int(x + col * tile_width * (1 - TILE_OVERLAP))
+                y1 = int(y + row * tile_height * (1 - TILE_OVERLAP))
+                # The edges are rounded up, the last tiles end on the edges of the region
+                x2 = min(int(math.ceil(x + col * tile_width * (1 - TILE_OVERLAP) + tile_width)), x + w)
+                y2 = min(int(math.ceil(y + row * tile_height * (1 - TILE_OVERLAP) + tile_height)), y + h)
+                tiles.append((x1, y1, x2 - x1, y2 - y1))
+    return tiles
+
+
+def crop_regions(zones, width, height, aspect_ratio):
+    """
+    Gives the regions of the frame inferred for the zones. The bounding rectangle of a
+    zone is enlarged by a margin and to the aspect ratio of the network input, so that
+    the crop is not distorted when resized. Overlapping regions are merged, an intruder
+    is never inferred twice. The zones are clipped to the frame.
+
+    :param zones: Polygons of the zones
+    :param width: Width of the frames
+    :param height: Height of the frames
+    :param aspect_ratio: Width over height of the network input
+    :return: List of x, y, width, height of the regions
+    :raises ValueError: When a zone has no pixel inside the frame
+    """
+    rects = []
+    for zone in zones:
+        x, y, w, h = cv2.boundingRect(zone)
+        x, y, x2, y2 = max(x, 0), max(y, 0), min(x + w, width), min(y + h, height)
+        if x2 <= x or y2 <= y:
+            raise ValueError("A zone is outside the frame")
+        w, h = x2 - x, y2 - y
+        x1, y1 = x - w * ZONE_MARGIN, y - h * ZONE_MARGIN
+        x2, y2 = x + w * (1 + ZONE_MARGIN), y + h * (1 + ZONE_MARGIN)
+        # Grow the short side to the aspect ratio of the network input
+        w, h = x2 - x1, y2 - y1
+        if w < h * aspect_ratio:
+            x1, x2 = x1 - (h * aspect_ratio - w) / 2, x2 + (h * aspect_ratio - w) / 2
+        else:
+            y1, y2 = y1 - (w / aspect_ratio - h) / 2, y2 + (w / aspect_ratio - h) / 2
+        rects.append([max(int(x1), 0), max(int(y1), 0), min(int(x2), width), min(int(y2), height)])
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in rects if x2 > x1 and y2 > y1]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from backends import BACKENDS, BACKEND_FAKE, BACKEND_OPENCV, FAKE_INPUT_SHAPE, BackendError, read_ir_input_shape, \
+    parse_input_resolution
+
+IR = """<?xml version="1.0" ?>
+<net name="test" version="10">
+    <layers>
+        <layer id="0" name="data" type="Parameter" version="opset1">
+            <output>
+                <port id="0" precision="FP32">
+                    <dim>1</dim>
+                    <dim>3</dim>
+                    <dim>64</dim>
+                    <dim>96</dim>
+                </port>
+            </output>
+        </layer>
+    </layers>
+</net>
+"""
+
+
+def _varint(value):
+    out = b""
+    while value > 0x7f:
+        out += bytes([value & 0x7f | 0x80])
+        value >>= 7
+    return out + bytes([value])
+
+
+def _field(number, value):
+    """
+    Encodes a field of a protobuf message, an int or a length-delimited string or message.
+    """
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def write_onnx_identity(path, shape):
+    """
+    Writes an ONNX model of a single Identity node, without the onnx package.
+    :param path: Path of the .onnx file
+    :param shape: Shape of the float input and output
+    :return: None
+    """
+    dims = b"".join(_field(1, _field(1, dim)) for dim in shape)
+    tensor_type = _field(1, _field(1, 1) + _field(2, dims))
+    graph = (_field(1, _field(1, "x") + _field(2, "y") + _field(3, "identity") + _field(4, "Identity")) +
+             _field(2, "graph") + _field(11, _field(1, "x") + _field(2, tensor_type)) +
+             _field(12, _field(1, "y") + _field(2, tensor_type)))
+    with open(path, "wb") as model:
+        # ir_version, opset_import and graph of the ModelProto
+        model.write(_field(1, 7) + _field(8, _field(2, 13)) + _field(7, graph))
+
+
+class FakeBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = BACKENDS[BACKEND_FAKE]()
+        self.addCleanup(self.backend.close)
+
+    def test_input_shape_without_ir(self):
+        self.backend.load("missing.xml", "CPU", 2, batch_size=4)
+        self.assertEqual(self.backend.input_shape, [4] + FAKE_INPUT_SHAPE[1:])
+        self.assertEqual(self.backend.num_requests, 2)
+
+    def test_detections_follow_the_frame(self):
+        self.backend.load("missing.xml", "CPU", 1, batch_size=2)
+        self.backend.input_buffers[0][0].fill(2)
+        self.backend.input_buffers[0][1].fill(1)
+        self.backend.start(0)
+        self.assertEqual(self.backend.wait(0), 0)
+        res = self.backend.output(0)
+        self.assertEqual(res.shape[:2], (1, 1))
+        self.assertEqual(res[0, 0, :, 0].tolist(), [0, 0, 1, -1])
+        self.assertEqual(res[0, 0, :3, 1].tolist(), [1, 2, 1])
+
+    def test_completion_callback(self):
+        completed = []
+        self.backend.load("missing.xml", "CPU", 2)
+        self.backend.set_completion_callback(lambda status, request_id: completed.append((status, request_id)))
+        self.backend.start(1)
+        self.backend.wait(1)
+        self.backend.close()
+        self.assertEqual(completed, [(0, 1)])
+
+
+class LoadErrorTest(unittest.TestCase):
+
+    def test_read_ir_input_shape(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model = os.path.join(tmp, "model.xml")
+            with open(model, "w") as ir:
+                ir.write(IR)
+            self.assertEqual(read_ir_input_shape(model), [1, 3, 64, 96])
+            with open(model, "w") as ir:
+                ir.write("<net")
+            self.assertRaises(ValueError, read_ir_input_shape, model)
+
+    def test_opencv_wraps_its_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model = os.path.join(tmp, "model.xml")
+            with open(model, "w") as ir:
+                ir.write(IR)
+            with open(os.path.join(tmp, "model.bin"), "wb") as weights:
+                weights.write(b"\0" * 16)
+            backend = BACKENDS[BACKEND_OPENCV]()
+            self.addCleanup(backend.close)
+            self.assertRaises(BackendError, backend.load, model, "CPU", 1)
+
+    def test_opencv_reads_other_formats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model = os.path.join(tmp, "model.onnx")
+            write_onnx_identity(model, [1, 3, 7, 8])
+            backend = BACKENDS[BACKEND_OPENCV]()
+            self.addCleanup(backend.close)
+            backend.load(model, "CPU", 1, input_resolution=(8, 7))
+            self.assertEqual(backend.input_shape, [1, 3, 7, 8])
+            backend.start(0)
+            self.assertEqual(backend.wait(0), 0)
+            self.assertEqual(backend.output(0).shape, (1, 1, 24, 7))
+
+    def test_opencv_needs_the_resolution_of_other_formats(self):
+        self.assertRaises(ValueError, BACKENDS[BACKEND_OPENCV]().load, "model.onnx", "CPU", 1)
+
+    def test_parse_input_resolution(self):
+        self.assertIsNone(parse_input_resolution(""))
+        self.assertEqual(parse_input_resolution("300x200"), (300, 200))
+        self.assertRaises(ValueError, parse_input_resolution, "300")
+        self.assertRaises(ValueError, parse_input_resolution, "0x200")
+
+    def test_opencv_unknown_device(self):
+        self.assertRaises(ValueError, BACKENDS[BACKEND_OPENCV]().load, "model.xml", "FPGA", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
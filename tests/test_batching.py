@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import time
+import collections
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+import intruder_detector
+from backends import BACKEND_FAKE
+from inference import Network
+
+
+class Source:
+    """
+    Video source of the jobs, with what collect_result reads of a VideoCap.
+    """
+
+    def __init__(self, width, height):
+        self.input_width = width
+        self.input_height = height
+        # The jobs are not queued for processing, they are checked by the tests
+        self.pending = collections.deque()
+
+
+class BatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        intruder_detector.BATCH_SIZE = 2
+        intruder_detector.BATCH_WAIT_MS = 20
+        intruder_detector.label_thresholds = numpy.full(3, 0.5)
+        intruder_detector.infer_network = Network(BACKEND_FAKE)
+        intruder_detector.infer_network.load_model("missing.xml", "CPU", 1, 1, 2, batch_size=2)
+        intruder_detector.in_flight = {}
+        intruder_detector.batch = []
+        self.addCleanup(intruder_detector.infer_network.clean)
+        # Frames the fake backend sees 2 intruders in
+        self.frame = numpy.full((240, 320, 3), 2, dtype=numpy.uint8)
+        self.source = Source(320, 240)
+
+    def collect(self):
+        while intruder_detector.in_flight:
+            intruder_detector.collect_result(intruder_detector.infer_network.wait_completed(timeout=5))
+
+    def test_full_batch(self):
+        jobs = [intruder_detector.InferJob(self.frame) for i in range(2)]
+        for job in jobs:
+            intruder_detector.add_to_batch(self.source, job)
+        self.assertEqual(intruder_detector.batch, [])
+        self.collect()
+        for job in jobs:
+            self.assertTrue(job.done)
+            self.assertEqual(job.res.shape[2], 2)
+
+    def test_partial_batch_waits_for_the_deadline(self):
+        job = intruder_detector.InferJob(self.frame)
+        intruder_detector.add_to_batch(self.source, job)
+        intruder_detector.submit_late_batch()
+        self.assertEqual(len(intruder_detector.batch), 1)
+        time.sleep(intruder_detector.BATCH_WAIT_MS / 1000)
+        intruder_detector.submit_late_batch()
+        self.assertEqual(intruder_detector.batch, [])
+        self.collect()
+        self.assertTrue(job.done)
+        # The detections of the unused slot of the batch are not given to the frame
+        self.assertEqual(job.res.shape[2], 2)
+        self.assertTrue((job.res[0, 0, :, 0] == 0).all())
+
+    def test_regions_are_reassembled(self):
+        job = intruder_detector.InferJob(self.frame, [(0, 0, 160, 240), (160, 0, 160, 240)])
+        intruder_detector.add_to_batch(self.source, job)
+        self.collect()
+        self.assertTrue(job.done)
+        # The boxes are in the coordinates of the frame, half of them in its right half
+        self.assertEqual(job.res.shape[2], 4)
+        self.assertEqual(int((job.res[0, 0, :, 3] >= 0.5).sum()), 2)
+
+    def test_failed_request(self):
+        def fail(request_id, frames):
+            raise RuntimeError("Inference failed")
+
+        intruder_detector.infer_network.backend.infer = fail
+        job = intruder_detector.InferJob(self.frame)
+        with self.assertLogs(level="ERROR"):
+            intruder_detector.add_to_batch(self.source, job)
+            intruder_detector.submit_batch()
+            self.collect()
+        self.assertTrue(job.done)
+        self.assertIsNone(job.res)
+        # The request is back in the pool
+        self.assertEqual(len(intruder_detector.infer_network.idle_requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+import intruder_detector
+from intruder_detector import diff_sources, read_config
+
+
+class DiffSourcesTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.videos = []
+        for i in range(3):
+            self.videos.append(os.path.join(self.dir, "video{}.mp4".format(i)))
+            open(self.videos[-1], 'w').close()
+        intruder_detector.CONFIG_FILE = os.path.join(self.dir, "config.json")
+
+    def read(self, videos, labels=("person",)):
+        """
+        Reads a configuration file with the given sources.
+        :param videos: Entries of the sources
+        :param labels: Labels of the intruders
+        :return: Sources of the configuration file
+        """
+        with open(intruder_detector.CONFIG_FILE, 'w') as config_file:
+            json.dump({"inputs": [{"video": videos, "label": list(labels)}]}, config_file)
+        ret, sources, labels, thresholds = read_config()
+        self.assertEqual(ret, 0)
+        return sources
+
+    def running(self, sources):
+        return [(entry, cam_name) for video, is_cam, cam_name, cams, video_options, entry in sources]
+
+    def test_unchanged(self):
+        sources = self.read(self.videos[:2])
+        self.assertEqual(diff_sources(self.running(sources), sources, 2), ([], []))
+
+    def test_label_change(self):
+        running = self.running(self.read(self.videos[:2]))
+        self.assertEqual(diff_sources(running, self.read(self.videos[:2], ["car", "person"]), 2), ([], []))
+
+    def test_added(self):
+        running = self.running(self.read(self.videos[:2]))
+        removed, added = diff_sources(running, self.read(self.videos), 2)
+        self.assertEqual(removed, [])
+        self.assertEqual([(video, cam_name, number) for video, is_cam, cam_name, number, video_options, entry
+                          in added], [(self.videos[2], "Cam 2", 3)])
+
+    def test_removed(self):
+        running = self.running(self.read(self.videos))
+        sources = self.read([self.videos[0], self.videos[2]])
+        self.assertEqual(diff_sources(running, sources, 3), ([json.dumps(self.videos[1])], []))
+
+    def test_added_source_takes_a_free_name(self):
+        running = self.running(self.read(self.videos[:2]))
+        removed, added = diff_sources(running, self.read([self.videos[0], self.videos[2]]), 2)
+        self.assertEqual(removed, [json.dumps(self.videos[1])])
+        # The position of the removed source is free again
+        self.assertEqual([(cam_name, number) for video, is_cam, cam_name, number, video_options, entry in added],
+                         [("Cam 1", 3)])
+        # The name of a running source is taken
+        running = self.running(self.read(self.videos[:2]))
+        removed, added = diff_sources(running, self.read([self.videos[2], self.videos[0]]), 2)
+        self.assertEqual([(cam_name, number) for video, is_cam, cam_name, number, video_options, entry in added],
+                         [("Cam 1", 3)])
+
+    def test_changed_options(self):
+        running = self.running(self.read(self.videos[:2]))
+        sources = self.read([self.videos[0], {"source": self.videos[1], "fps": 5}])
+        removed, added = diff_sources(running, sources, 2)
+        # Restarted with its new options, under a new video ID
+        self.assertEqual(removed, [json.dumps(self.videos[1])])
+        self.assertEqual([(video, cam_name, number, video_options['target_fps']) for video, is_cam, cam_name,
+                          number, video_options, entry in added], [(self.videos[1], "Cam 1", 3, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from backends import BACKENDS, BACKEND_FAKE
+from detection import parse_detections, region_to_frame, merge_detections, iou_matrix
+
+
+def fake_output(values):
+    """
+    Runs the fake backend on frames filled with the given values.
+    :param values: Pixel value of every frame of the batch
+    :return: Output of the backend, of shape [1, 1, N, 7]
+    """
+    backend = BACKENDS[BACKEND_FAKE]()
+    backend.load("missing.xml", "CPU", 1, batch_size=len(values))
+    for frame, value in zip(backend.input_buffers[0], values):
+        frame.fill(value)
+    backend.start(0)
+    backend.wait(0)
+    backend.close()
+    return backend.output(0)
+
+
+def detections(*rows):
+    return numpy.array(list(rows) + [[-1, 0, 0, 0, 0, 0, 0]], dtype=numpy.float32).reshape(1, 1, -1, 7)
+
+
+class ParseDetectionsTest(unittest.TestCase):
+
+    def test_labels_and_boxes(self):
+        res = fake_output([3])
+        labels, boxes, counts = parse_detections(res, numpy.array([True, True, True]),
+                                                 numpy.full(3, 0.5), 300, 200)
+        self.assertEqual(labels.tolist(), [0, 1, 2])
+        self.assertEqual(boxes[0].tolist(), [0, 50, 50, 150])
+        self.assertEqual(counts.tolist(), [1, 1, 1])
+
+    def test_label_mask_and_thresholds(self):
+        res = fake_output([3])
+        labels, boxes, counts = parse_detections(res, numpy.array([True, False, True]),
+                                                 numpy.array([0.5, 0.5, 0.95]), 300, 200)
+        self.assertEqual(labels.tolist(), [0])
+        self.assertEqual(counts.tolist(), [1, 0, 0])
+
+    def test_labels_outside_the_label_file(self):
+        res = detections([0, 5, 0.9, 0, 0, 1, 1])
+        labels, boxes, counts = parse_detections(res, numpy.array([True]), numpy.array([0.5]), 10, 10)
+        self.assertEqual(len(labels), 0)
+        self.assertEqual(counts.tolist(), [0])
+
+    def test_zones(self):
+        res = fake_output([2])
+        zones = numpy.zeros((200, 300), dtype=numpy.uint8)
+        # Only the bottom center of the second box, at x 125, is in the zone
+        zones[:, 100:200] = 1
+        labels, boxes, counts = parse_detections(res, numpy.array([True, True]), numpy.full(2, 0.5),
+                                                 300, 200, zones)
+        self.assertEqual(labels.tolist(), [1])
+
+
+class MergeDetectionsTest(unittest.TestCase):
+
+    def test_region_to_frame(self):
+        res = region_to_frame(detections([0, 1, 0.9, 0, 0, 0.5, 0.5]), (100, 50, 200, 100), 400, 200)
+        numpy.testing.assert_allclose(res[0, 0, 0, 3:7], [0.25, 0.25, 0.5, 0.5])
+
+    def test_box_cut_by_a_tile(self):
+        res = detections([0, 1, 0.9, 0.1, 0.1, 0.5, 0.5],
+                         [0, 1, 0.8, 0.3, 0.1, 0.5, 0.5])
+        merged = merge_detections(res, 0.7)
+        self.assertEqual(merged.shape, (1, 1, 1, 7))
+        self.assertAlmostEqual(float(merged[0, 0, 0, 2]), 0.9)
+
+    def test_labels_are_not_merged(self):
+        res = detections([0, 1, 0.9, 0.1, 0.1, 0.5, 0.5],
+                         [0, 2, 0.8, 0.1, 0.1, 0.5, 0.5])
+        self.assertEqual(merge_detections(res, 0.7).shape[2], 2)
+
+    def test_min_confidence(self):
+        res = detections([0, 1, 0.9, 0.1, 0.1, 0.2, 0.2],
+                         [0, 1, 0.2, 0.6, 0.6, 0.8, 0.8])
+        merged = merge_detections(res, 0.7, min_confidence=0.5)
+        self.assertEqual(merged.shape[2], 1)
+
+    def test_iou_matrix(self):
+        iou = iou_matrix([[0, 0, 2, 2]], [[0, 0, 2, 2], [1, 0, 3, 2], [4, 4, 5, 5]])
+        numpy.testing.assert_allclose(iou, [[1, 1 / 3, 0]], rtol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from events import EventJournal, EventStore, TimelineRollup, write_atomic
+from intruder_detector import Event
+
+
+class TimelineRollupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.timeline = TimelineRollup("timeline_{}.json", [1, 60], 3)
+
+    def test_buckets(self):
+        self.timeline.add("video1", "person", 0.5)
+        self.timeline.add("video1", "person", 0.7)
+        self.timeline.add("video1", "car", 61)
+        files = dict(self.timeline.export({"video1": 3}))
+        self.assertEqual(sorted(files), ["timeline_1.json", "timeline_60.json"])
+        minutes = files["timeline_60.json"]["videos"]["video1"]
+        self.assertEqual(minutes[0], {"count": 2, "labels": {"person": 2}})
+        self.assertEqual(minutes[60], {"count": 1, "labels": {"car": 1}})
+        self.assertEqual(files["timeline_60.json"]["totals"], {"video1": "3"})
+
+    def test_only_changed_resolutions_are_exported(self):
+        self.timeline.add("video1", "person", 1)
+        self.timeline.export({})
+        self.assertEqual(self.timeline.export({}), [])
+
+    def test_export_is_a_copy(self):
+        self.timeline.add("video1", "person", 1)
+        files = dict(self.timeline.export({}))
+        self.timeline.add("video1", "person", 1)
+        self.assertEqual(files["timeline_1.json"]["videos"]["video1"][1]["labels"], {"person": 1})
+
+    def test_oldest_buckets_are_dropped(self):
+        for second in range(5):
+            self.timeline.add("video1", "person", second)
+        self.timeline.add("video2", "person", 0)
+        files = dict(self.timeline.export({}))
+        self.assertEqual(sorted(files["timeline_1.json"]["videos"]["video1"]), [2, 3, 4])
+        self.assertEqual(sorted(files["timeline_1.json"]["videos"]["video2"]), [0])
+        self.assertEqual(sorted(files["timeline_60.json"]["videos"]["video1"]), [0])
+
+
+
+class EventJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.journal_file = os.path.join(self.dir, "events.jsonl")
+        self.event_file = os.path.join(self.dir, "events.json")
+        self.data_file = os.path.join(self.dir, "data.json")
+
+    def open_journal(self, snapshot_interval=60):
+        journal = EventJournal(self.journal_file, self.event_file, self.data_file, 0.01, snapshot_interval, 10)
+        journal.open()
+        self.addCleanup(journal.close)
+        return journal
+
+    def append(self, journal, count):
+        return journal.append("video1", "cam1", Event("00:00:01", "person", count, count), count)
+
+    def test_sequence_continues_across_runs(self):
+        journal = self.open_journal()
+        self.assertEqual([self.append(journal, count) for count in (1, 2)], [0, 1])
+        journal.close()
+        # Last line cut by a crash while it was written
+        with open(self.journal_file, 'a') as journal_file:
+            journal_file.write('{"seq": 2, "vid')
+        journal = self.open_journal()
+        self.assertEqual(self.append(journal, 3), 2)
+        journal.close()
+        with open(self.journal_file) as journal_file:
+            lines = journal_file.read().splitlines()
+        self.assertEqual(lines[2], '{"seq": 2, "vid')
+        self.assertEqual([json.loads(lines[i])["count"] for i in (0, 1, 3)], [1, 2, 3])
+
+    def test_snapshot(self):
+        journal = self.open_journal()
+        for count in (1, 2):
+            self.append(journal, count)
+        journal.write_snapshot()
+        with open(self.event_file) as event_file:
+            self.assertEqual(json.load(event_file)["video1"]["1"]["content"], "person")
+        with open(self.data_file) as data_file:
+            self.assertEqual(json.load(data_file), {"video1": {"1": "1", "2": "2"}, "totals": {"video1": "2"}})
+        self.assertEqual(sorted(os.listdir(self.dir)), ["data.json", "events.json", "events.jsonl"])
+
+    def test_write_atomic_keeps_the_previous_content(self):
+        write_atomic(self.event_file, "{}")
+        with mock.patch("os.fsync", side_effect=OSError("Disk full")):
+            self.assertRaises(OSError, write_atomic, self.event_file, '{"video1": {}}')
+        with open(self.event_file) as event_file:
+            self.assertEqual(event_file.read(), "{}")
+
+    def test_thread_survives_errors(self):
+        journal = self.open_journal(snapshot_interval=0.01)
+        with mock.patch("events.write_atomic", side_effect=OSError("Disk full")), \
+                self.assertLogs(level="ERROR"):
+            self.append(journal, 1)
+            journal.stop_event.wait(0.1)
+        self.assertTrue(journal.thread.is_alive())
+        # The snapshot that failed is written once the error is gone
+        self.append(journal, 2)
+        journal.stop_event.wait(0.1)
+        with open(self.data_file) as data_file:
+            self.assertEqual(json.load(data_file)["totals"], {"video1": "2"})
+
+
+
+class EventStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.store = EventStore(os.path.join(self.dir, "events.db"), 0.01)
+        self.store.open()
+        self.addCleanup(self.store.close)
+
+    def append(self, seq):
+        self.store.append(seq, "video1", "cam1", Event("00:00:01", "person", seq + 1, seq, timestamp=1000 + seq), seq)
+
+    def test_since(self):
+        for seq in range(5):
+            self.append(seq)
+        self.store.flush()
+        self.assertEqual([event["seq"] for event in self.store.since(2, 2)], [2, 3])
+        self.assertEqual([event["seq"] for event in self.store.since(3, 10)], [3, 4])
+        self.assertEqual(self.store.since(5, 10), [])
+        self.assertEqual(self.store.since(4, 1)[0]["camera"], "cam1")
+
+    def test_thread_survives_errors(self):
+        # The connection is replaced, sqlite3.Connection can't be patched
+        db = self.store.db
+        self.store.db = None
+        with self.assertLogs(level="ERROR"):
+            self.append(0)
+            self.store.stop_event.wait(0.1)
+        self.assertTrue(self.store.thread.is_alive())
+        # The events that failed are inserted once the error is gone
+        self.store.db = db
+        self.append(1)
+        self.store.stop_event.wait(0.1)
+        self.assertEqual([event["seq"] for event in self.store.since(0, 10)], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
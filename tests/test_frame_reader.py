@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from frame_reader import FrameReader, POLICY_BLOCK, keep_frame
+
+
+class EndlessCapture:
+    """
+    Source with an endless number of black frames, in place of a cv2.VideoCapture.
+    """
+
+    def grab(self):
+        return True
+
+    def retrieve(self):
+        return True, numpy.zeros((4, 4, 3), dtype=numpy.uint8)
+
+    def set(self, prop, value):
+        return True
+
+
+class KeepFrameTest(unittest.TestCase):
+
+    def test_every_frame(self):
+        self.assertTrue(all(keep_frame(idx, 1) for idx in range(100)))
+
+    def test_kept_frames_are_evenly_spread(self):
+        kept = [idx for idx in range(30) if keep_frame(idx, 10 / 30)]
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual({b - a for a, b in zip(kept, kept[1:])}, {3})
+
+    def test_fractional_ratio(self):
+        kept = [idx for idx in range(250) if keep_frame(idx, 12 / 25)]
+        self.assertEqual(len(kept), 120)
+
+
+
+class FrameReaderTest(unittest.TestCase):
+
+    def test_stop_a_blocked_reader(self):
+        reader = FrameReader(EndlessCapture(), 1, False, 2, POLICY_BLOCK, threading.Event())
+        reader.start()
+        while len(reader.frames) < 2:
+            time.sleep(0.01)
+        reader.stop()
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(len(reader.frames), 2)
+        self.assertEqual(reader.dropped_frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from backends import BACKEND_FAKE
+from inference import Network
+
+
+class NetworkPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.network = Network(BACKEND_FAKE)
+        self.network.load_model("missing.xml", "CPU", 1, 1, 3)
+        self.addCleanup(self.network.clean)
+
+    def test_idle_requests(self):
+        requests = [self.network.get_idle_request() for i in range(3)]
+        self.assertEqual(sorted(requests), [0, 1, 2])
+        self.assertIsNone(self.network.get_idle_request())
+        self.network.release_request(requests[1])
+        self.assertEqual(self.network.get_idle_request(), requests[1])
+
+    def test_completion_order(self):
+        while self.network.get_idle_request() is not None:
+            pass
+        self.network.exec_net(2)
+        self.assertEqual(self.network.wait_completed(timeout=5), 2)
+        self.assertEqual(self.network.wait(2), 0)
+        self.assertEqual(self.network.get_output(2).shape[:2], (1, 1))
+        self.assertIsNone(self.network.wait_completed(timeout=0.01))
+
+    def test_warm_up_is_not_a_result(self):
+        self.network.warm_up()
+        self.assertIsNone(self.network.wait_completed(timeout=0.01))
+        self.assertEqual(self.network.num_requests, 3)
+
+    def test_preprocess_into_the_input(self):
+        request_id = self.network.get_idle_request()
+        self.network.preprocess(request_id, 0, numpy.full((10, 20, 3), 7, dtype=numpy.uint8))
+        self.assertTrue((self.network.input_buffers[request_id][0] == 7).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import unittest
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from live import EventStream, LiveServer
+
+
+class LiveServerTest(unittest.TestCase):
+
+    def serve(self, allow_origin=None):
+        stream = EventStream(None, 10, 0)
+        stream.publish({"seq": 0, "label": "person"})
+        server = LiveServer(stream, "127.0.0.1", 0, 1, allow_origin)
+        server.start()
+        self.addCleanup(server.stop)
+        return "http://127.0.0.1:{}".format(server.server.server_address[1])
+
+    def test_poll(self):
+        with urlopen(self.serve() + "/poll?since=0&timeout=1") as response:
+            body = json.loads(response.read())
+        self.assertEqual(body, {"events": [{"seq": 0, "label": "person"}], "next": 1})
+
+    def test_no_cors_header_by_default(self):
+        with urlopen(self.serve() + "/poll?since=0&timeout=1") as response:
+            self.assertIsNone(response.headers.get("Access-Control-Allow-Origin"))
+
+    def test_allowed_origin(self):
+        with urlopen(self.serve("http://localhost:8000") + "/poll?since=0&timeout=1") as response:
+            self.assertEqual(response.headers.get("Access-Control-Allow-Origin"), "http://localhost:8000")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from motion import MotionDetector
+
+
+def frame(level, changed_rows=240):
+    """
+    Gray frame whose top rows are at another level.
+    :param level: Gray level of the top rows
+    :param changed_rows: Number of the top rows
+    :return: Frame of 320x240
+    """
+    image = numpy.full((240, 320, 3), 100, dtype=numpy.uint8)
+    image[:changed_rows] = level
+    return image
+
+
+class MotionDetectorTest(unittest.TestCase):
+
+    def test_first_frame_is_inferred(self):
+        self.assertTrue(MotionDetector(0.01, 0).check(frame(100)))
+
+    def test_threshold(self):
+        motion = MotionDetector(0.2, 0)
+        motion.check(frame(100))
+        # A change smaller than the pixel threshold doesn't count
+        self.assertFalse(motion.check(frame(110)))
+        # A tenth of the pixels changed
+        self.assertFalse(motion.check(frame(200, 24)))
+        motion = MotionDetector(0.05, 0)
+        motion.check(frame(100))
+        self.assertTrue(motion.check(frame(200, 24)))
+
+    def test_refresh_interval(self):
+        motion = MotionDetector(0.01, 3)
+        self.assertEqual([motion.check(frame(100)) for i in range(9)],
+                         [True, False, False, False, True, False, False, False, True])
+
+    def test_no_refresh_interval(self):
+        motion = MotionDetector(0.01, 0)
+        motion.check(frame(100))
+        self.assertFalse(any(motion.check(frame(100)) for i in range(100)))
+
+    def test_reference_is_the_last_inferred_frame(self):
+        motion = MotionDetector(0.01, 0)
+        motion.check(frame(100))
+        # A slow change is seen once it is large enough since the last inferred frame
+        self.assertEqual([motion.check(frame(level)) for level in (115, 130, 145, 160)],
+                         [False, True, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
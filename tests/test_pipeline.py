@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import unittest
+import cv2
+import numpy
+
+APPLICATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application")
+LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources", "labels.txt")
+# Gray level of the frames of the static video, which the fake backend turns into two detections
+STATIC_LEVEL = 128
+
+
+class PipelineTest(unittest.TestCase):
+    """
+    Runs the detector with the fake backend on a generated video, in the directory layout
+    of the repository, and counts the events of its journal.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for directory in ("application", "resources", "UI/resources/video_data", "UI/resources/videos"):
+            os.makedirs(os.path.join(self.root, directory))
+        shutil.copy(LABELS, os.path.join(self.root, "resources", "labels.txt"))
+
+    def write_video(self, name, frames, level):
+        path = os.path.join(self.root, name)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 240))
+        frame = numpy.full((240, 320, 3), level, dtype=numpy.uint8)
+        for i in range(frames):
+            writer.write(frame)
+        writer.release()
+        return path
+
+    def run_detector(self, video, *args):
+        """
+        :return: Events of the run, the journal of the previous runs is removed
+        """
+        journal_file = os.path.join(self.root, "UI", "resources", "video_data", "events.jsonl")
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
+        with open(os.path.join(self.root, "resources", "config.json"), "w") as config:
+            json.dump({"inputs": [{"video": video, "label": ["person", "car", "bicycle"]}]}, config)
+        result = subprocess.run([sys.executable, os.path.join(APPLICATION, "intruder_detector.py"),
+                                 "-m", "model.xml", "-lb", "../resources/labels.txt", "-be", "fake",
+                                 "-hl", "true", "-rl", "false"] + list(args),
+                                cwd=os.path.join(self.root, "application"), stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, universal_newlines=True, timeout=120)
+        self.assertIn("Success!", result.stdout, result.stdout)
+        with open(journal_file) as journal:
+            return [json.loads(line) for line in journal]
+
+    def test_static_scene(self):
+        video = self.write_video("static.avi", 90, STATIC_LEVEL)
+        counts = {}
+        for name, args in (("baseline", []), ("motion gate", ["-mg", "0.01"]), ("tracker", ["-tr", "true"]),
+                           ("motion gate and tracker", ["-mg", "0.01", "-tr", "true"])):
+            counts[name] = len(self.run_detector(video, *args))
+        self.assertEqual(counts["baseline"], 2)
+        self.assertEqual(counts, dict.fromkeys(counts, 2))
+
+
+    def test_stationary_intruder_counted_once(self):
+        # Many refresh intervals of the motion gate, with its tracks kept between them
+        video = self.write_video("long.avi", 300, STATIC_LEVEL)
+        events = self.run_detector(video, "-mg", "0.01", "-mr", "30", "-tr", "true")
+        self.assertEqual(len(events), 2)
+        self.assertEqual(len({event["track"] for event in events}), 2)
+
+
+    def test_snapshots_show_the_boxes(self):
+        video = self.write_video("static.avi", 30, STATIC_LEVEL)
+        for args in ([], ["-tr", "true"]):
+            self.run_detector(video, *args)
+            snapshot = cv2.imread(os.path.join(self.root, "application", "output", "intruder_1.png"))
+            # Green pixels of the boxes drawn on the gray frame
+            boxes = (snapshot[:, :, 0] == 0) & (snapshot[:, :, 1] == 255) & (snapshot[:, :, 2] == 0)
+            self.assertTrue(boxes.any(), args)
+
+
+if __name__ == '__main__':
+    unittest.main()
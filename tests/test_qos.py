@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from qos import QosController
+
+
+class QosControllerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.qos = QosController(0.1, 3, hold=2, restore=0.5, smoothing=1)
+        self.qos.last_change = 0
+
+    def test_degrades_over_the_budget(self):
+        self.assertTrue(self.qos.update(0.2, now=10))
+        self.assertEqual(self.qos.level, 1)
+
+    def test_hold_time(self):
+        self.qos.update(0.2, now=10)
+        self.assertFalse(self.qos.update(0.2, now=11))
+        self.assertTrue(self.qos.update(0.2, now=12))
+        self.assertEqual(self.qos.level, 2)
+
+    def test_lowest_level(self):
+        for now in range(10, 30, 2):
+            self.qos.update(0.2, now=now)
+        self.assertEqual(self.qos.level, 2)
+
+    def test_restores_under_a_fraction_of_the_budget(self):
+        self.qos.update(0.2, now=10)
+        # Between the restore fraction and the budget the level is kept
+        self.assertFalse(self.qos.update(0.07, now=20))
+        self.assertTrue(self.qos.update(0.01, now=30))
+        self.assertEqual(self.qos.level, 0)
+        self.assertFalse(self.qos.update(0.01, now=40))
+
+    def test_smoothing(self):
+        qos = QosController(0.1, 3, hold=0, smoothing=0.5)
+        self.assertFalse(qos.update(0.15, now=1))
+        self.assertAlmostEqual(qos.latency, 0.075)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import queue
+import threading
+import unittest
+import multiprocessing
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from frame_reader import POLICY_BLOCK
+from shard import END_OF_STREAM, decode_source, shared_memory
+
+
+class ResizedCapture:
+    """
+    Source whose frames change size after a few frames, in place of a cv2.VideoCapture.
+    """
+
+    def __init__(self, frames, shape, resized_shape):
+        self.frames = frames
+        self.shape = shape
+        self.resized_shape = resized_shape
+        self.idx = 0
+
+    def grab(self):
+        self.idx += 1
+        return self.idx <= self.frames
+
+    def retrieve(self, frame=None):
+        # A frame of another size can't be decoded in place
+        return True, numpy.ones(self.shape if self.idx < 3 else self.resized_shape, dtype=numpy.uint8)
+
+    def set(self, prop, value):
+        return True
+
+
+@unittest.skipIf(shared_memory is None, "shared memory needs Python 3.8 or newer")
+class DecodeSourceTest(unittest.TestCase):
+
+    def decode(self, vc, shape, slots):
+        shm = shared_memory.SharedMemory(create=True, size=slots * int(numpy.prod(shape)))
+        self.addCleanup(shm.unlink)
+        self.addCleanup(shm.close)
+        ready_queue, free_queue = queue.Queue(), queue.Queue()
+        for slot in range(slots):
+            free_queue.put(slot)
+        thread = threading.Thread(target=decode_source, args=(
+            vc, shm.name, shape, slots, False, POLICY_BLOCK, ready_queue, free_queue,
+            multiprocessing.Value('i', 0), multiprocessing.Value('d', 1), threading.Event()))
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        return [ready_queue.get_nowait()[0] for i in range(ready_queue.qsize())]
+
+    def test_end_of_stream(self):
+        slots = self.decode(ResizedCapture(2, (4, 4, 3), (4, 4, 3)), (4, 4, 3), 4)
+        self.assertEqual(slots, [0, 1, END_OF_STREAM])
+
+    def test_frame_size_change_ends_the_source(self):
+        with self.assertLogs(level="ERROR"):
+            slots = self.decode(ResizedCapture(5, (4, 4, 3), (8, 8, 3)), (4, 4, 3), 4)
+        self.assertEqual(slots, [0, 1, END_OF_STREAM])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from tracker import IouTracker
+
+
+class IouTrackerTest(unittest.TestCase):
+
+    def test_confirmed_after_min_hits(self):
+        tracker = IouTracker(min_hits=2, max_age=5)
+        self.assertEqual(tracker.update([0], numpy.array([[0, 0, 10, 10]])), [])
+        confirmed = tracker.update([0], numpy.array([[1, 0, 11, 10]]))
+        self.assertEqual([track.track_id for track in confirmed], [1])
+        # A track is reported once
+        self.assertEqual(tracker.update([0], numpy.array([[2, 0, 12, 10]])), [])
+        self.assertEqual(len(tracker.active_tracks()), 1)
+
+    def test_labels_are_not_matched(self):
+        tracker = IouTracker(min_hits=2, max_age=5)
+        tracker.update([0], numpy.array([[0, 0, 10, 10]]))
+        self.assertEqual(tracker.update([1], numpy.array([[0, 0, 10, 10]])), [])
+        self.assertEqual(sorted(track.track_id for track in tracker.tracks), [1, 2])
+
+    def test_prediction_follows_the_velocity(self):
+        tracker = IouTracker(min_hits=1, max_age=5)
+        tracker.update([0], numpy.array([[0, 0, 10, 10]]))
+        tracker.update([0], numpy.array([[2, 0, 12, 10]]))
+        tracker.predict()
+        numpy.testing.assert_allclose(tracker.tracks[0].box, [4, 0, 14, 10])
+        # Matched after a frame without detection, where the prediction put it
+        tracker.update([0], numpy.array([[6, 0, 16, 10]]))
+        self.assertEqual(len(tracker.tracks), 1)
+
+    def test_tracks_expire(self):
+        tracker = IouTracker(min_hits=1, max_age=2)
+        tracker.update([0], numpy.array([[0, 0, 10, 10]]))
+        tracker.predict()
+        tracker.predict()
+        self.assertEqual(len(tracker.tracks), 1)
+        tracker.predict()
+        self.assertEqual(tracker.tracks, [])
+
+    def test_no_detections(self):
+        tracker = IouTracker(min_hits=1, max_age=2)
+        self.assertEqual(tracker.update(numpy.zeros(0, dtype=numpy.int32), numpy.zeros((0, 4))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
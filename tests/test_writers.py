@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import cv2
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from writers import ClipRecorder, SnapshotWriter, VideoRecorder
+
+CODEC = cv2.VideoWriter_fourcc(*"mp4v")
+
+
+class VideoRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "video.mp4")
+        self.frame = numpy.zeros((48, 64, 3), dtype=numpy.uint8)
+
+    def record(self, frames, queue_size, max_fps=0):
+        recorder = VideoRecorder(self.path, CODEC, 30, (64, 48), queue_size, max_fps=max_fps)
+        for i in range(frames):
+            recorder.write(self.frame)
+        recorder.release()
+        return recorder
+
+    def test_video_time(self):
+        recorder = self.record(30, 100)
+        self.assertEqual(recorder.recorded_frames, 30)
+        self.assertAlmostEqual(recorder.video_time, 1)
+
+    def test_skipped_frames(self):
+        recorder = self.record(30, 100, max_fps=10)
+        self.assertEqual(recorder.frame_count, 30)
+        self.assertEqual(recorder.recorded_frames, 10)
+        self.assertAlmostEqual(recorder.video_time, 1)
+
+    def test_dropped_frames_are_not_in_the_video(self):
+        recorder = self.record(30, 0)
+        self.assertEqual(recorder.dropped_frames, 30)
+        self.assertEqual(recorder.video_time, 0)
+
+
+
+class SnapshotWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def frame(self, level):
+        return numpy.full((48, 64, 3), level, dtype=numpy.uint8)
+
+    def test_full_queue(self):
+        # Without workers the snapshots stay in the queue
+        writer = SnapshotWriter(0, 2, "png")
+        writer.submit("cam1", "a1", self.frame(1))
+        writer.submit("cam2", "b1", self.frame(2))
+        # Replaces the queued snapshot of its source
+        writer.submit("cam1", "a2", self.frame(3))
+        self.assertEqual([(source, path, int(frame[0, 0, 0])) for source, path, frame in writer.queue],
+                         [("cam1", "a2.png", 3), ("cam2", "b1.png", 2)])
+        self.assertEqual(writer.merged_snapshots, 1)
+        # No queued snapshot of its source, the oldest one is dropped
+        writer.submit("cam3", "c1", self.frame(4))
+        self.assertEqual([path for source, path, frame in writer.queue], ["b1.png", "c1.png"])
+        self.assertEqual(writer.dropped_snapshots, 1)
+        writer.close()
+
+    def test_frame_is_copied(self):
+        writer = SnapshotWriter(0, 2, "png")
+        frame = self.frame(1)
+        writer.submit("cam1", "a1", frame)
+        frame[:] = 2
+        self.assertEqual(writer.queue[0][2][0, 0, 0], 1)
+        writer.close()
+
+    def test_snapshots_are_written(self):
+        writer = SnapshotWriter(2, 10, "jpg", quality=90)
+        for i in range(5):
+            writer.submit("cam1", os.path.join(self.dir, "snapshot_{}".format(i)), self.frame(i * 50))
+        writer.close()
+        self.assertEqual(sorted(os.listdir(self.dir)), ["snapshot_{}.jpg".format(i) for i in range(5)])
+        self.assertEqual(writer.failed_snapshots, 0)
+        self.assertEqual(cv2.imread(os.path.join(self.dir, "snapshot_4.jpg")).shape, (48, 64, 3))
+
+
+
+class ClipRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.frame = numpy.zeros((48, 64, 3), dtype=numpy.uint8)
+        # Pre-roll of 3 frames, post-roll of 5 frames
+        self.clips = ClipRecorder(self.dir, "cam1", CODEC, 10, (64, 48), 0.3, 0.5, 100)
+
+    def write(self, frames):
+        for i in range(frames):
+            self.clips.write(self.frame)
+
+    def frame_count(self, clip):
+        cap = cv2.VideoCapture(os.path.join(self.dir, clip))
+        count = 0
+        while cap.read()[0]:
+            count += 1
+        cap.release()
+        return count
+
+    def test_pre_roll_and_post_roll(self):
+        self.write(10)
+        self.assertEqual(self.clips.trigger("1"), ("cam1_1.mp4", 0.3))
+        self.write(10)
+        self.clips.release()
+        self.assertEqual(os.listdir(self.dir), ["cam1_1.mp4"])
+        self.assertEqual(self.frame_count("cam1_1.mp4"), 8)
+
+    def test_event_during_post_roll_extends_the_clip(self):
+        self.write(10)
+        self.clips.trigger("1")
+        self.write(4)
+        self.assertEqual(self.clips.trigger("2"), ("cam1_1.mp4", 0.7))
+        self.write(10)
+        self.clips.release()
+        self.assertEqual(self.clips.clip_count, 1)
+        self.assertEqual(self.frame_count("cam1_1.mp4"), 12)
+
+    def test_event_after_post_roll_starts_a_clip(self):
+        self.write(10)
+        self.clips.trigger("1")
+        self.write(7)
+        # Only 2 frames recorded since the end of the first clip
+        self.assertEqual(self.clips.trigger("2"), ("cam1_2.mp4", 0.2))
+        self.clips.release()
+        self.assertEqual(self.clips.clip_count, 2)
+        self.assertEqual(self.frame_count("cam1_1.mp4"), 8)
+        self.assertEqual(self.frame_count("cam1_2.mp4"), 2)
+
+    def test_skipped_frames_are_not_in_the_clip_time(self):
+        self.clips.release()
+        self.clips = ClipRecorder(self.dir, "cam1", CODEC, 30, (64, 48), 0.3, 0.5, 100, max_fps=10)
+        self.write(30)
+        self.assertEqual(self.clips.trigger("1"), ("cam1_1.mp4", 0.3))
+        self.clips.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
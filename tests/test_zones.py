@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+ Copyright (c) 2018 Intel Corporation.
+
+ Permission is hereby granted, free of charge, to any person obtaining
+ a copy of this software and associated documentation files (the
+ "Software"), to deal in the Software without restriction, including
+ without limitation the rights to use, copy, modify, merge, publish,
+ distribute, sublicense, and/or sell copies of the Software, and to
+ permit persons to whom the Software is furnished to do so, subject to
+ the following conditions:
+
+ The above copyright notice and this permission notice shall be
+ included in all copies or substantial portions of the Software.
+
+ THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+ EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+ MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+ NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+ LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from zones import parse_zone, parse_tiles, auto_tiles, tile_regions, crop_regions, zone_mask
+
+
+class ZonesTest(unittest.TestCase):
+
+    def test_parse_zone(self):
+        self.assertEqual(parse_zone([10, 20, 30, 40]).tolist(), [[10, 20], [40, 20], [40, 60], [10, 60]])
+        self.assertEqual(parse_zone([[0, 0], [5, 0], [0, 5]]).shape, (3, 2))
+        self.assertRaises(ValueError, parse_zone, [[0, 0], [5, 0]])
+
+    def test_zone_mask(self):
+        mask = zone_mask([parse_zone([10, 10, 20, 20])], 100, 50)
+        self.assertEqual(mask.shape, (50, 100))
+        self.assertTrue(mask[20, 20])
+        self.assertFalse(mask[40, 80])
+
+    def test_crop_regions_aspect_ratio(self):
+        regions = crop_regions([parse_zone([100, 100, 50, 50])], 640, 360, 2)
+        self.assertEqual(len(regions), 1)
+        x, y, w, h = regions[0]
+        self.assertAlmostEqual(w / h, 2, delta=0.05)
+        self.assertTrue(x <= 100 and y <= 100 and x + w >= 150 and y + h >= 150)
+
+    def test_crop_regions_merges_overlapping_zones(self):
+        zones = [parse_zone([100, 100, 50, 50]), parse_zone([140, 100, 50, 50]), parse_zone([500, 250, 50, 50])]
+        self.assertEqual(len(crop_regions(zones, 640, 360, 1)), 2)
+
+    def test_crop_regions_clips_to_the_frame(self):
+        regions = crop_regions([parse_zone([-20, -20, 60, 60]), parse_zone([300, 200, 200, 200])], 320, 240, 1)
+        for x, y, w, h in regions:
+            self.assertTrue(x >= 0 and y >= 0 and w > 0 and h > 0)
+            self.assertTrue(x + w <= 320 and y + h <= 240)
+
+    def test_crop_regions_zone_outside_the_frame(self):
+        self.assertRaises(ValueError, crop_regions, [parse_zone([400, 10, 50, 50])], 320, 240, 1)
+
+    def test_parse_tiles(self):
+        self.assertEqual(parse_tiles("3x2"), (3, 2))
+        self.assertRaises(ValueError, parse_tiles, "0x2")
+
+    def test_auto_tiles(self):
+        self.assertEqual(auto_tiles(300, 300, 300, 300, 4), (1, 1))
+        self.assertEqual(auto_tiles(1920, 1080, 300, 300, 4), (2, 2))
+
+    def test_tile_regions_cover_the_region(self):
+        tiles = tile_regions([(10, 20, 300, 200)], 3, 2)
+        self.assertEqual(len(tiles), 6)
+        covered = numpy.zeros((240, 320), dtype=bool)
+        for x, y, w, h in tiles:
+            self.assertTrue(x >= 10 and y >= 20 and x + w <= 310 and y + h <= 220)
+            covered[y:y + h, x:x + w] = True
+        self.assertTrue(covered[20:220, 10:310].all())
+
+
+if __name__ == '__main__':
+    unittest.main()